@@ -1 +1,4 @@
-from . import models
\ No newline at end of file
+from . import controllers
+from . import models
+from . import report
+from . import wizard
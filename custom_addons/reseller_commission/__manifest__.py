@@ -1,14 +1,30 @@
 {
     'name': 'Reseller Commission Tracking',
-    'version': '1.0.0',
+    'version': '1.0.8',
     'category': 'Sales',
     'summary': 'Agent commission tracking & invoicing',
     'description': 'PSAK 72 compliant agent commission management',
     'author': 'Dora & Team',
     'depends': ['sale_management', 'account'],
     'data': [
+        'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
+        'views/reseller_commission_menus.xml',
+        'views/res_config_settings_views.xml',
+        'views/reseller_commission_rate_views.xml',
+        'views/reseller_commission_rule_views.xml',
+        'views/reseller_commission_summary_views.xml',
+        'views/reseller_commission_ledger_views.xml',
+        'views/reseller_commission_metric_views.xml',
         'views/res_partner_views.xml',
+        'views/product_template_views.xml',
         'views/sale_order_views.xml',
+        'report/reseller_commission_report_views.xml',
+        'wizard/commission_settlement_wizard_views.xml',
+        'wizard/commission_recompute_wizard_views.xml',
+        'wizard/commission_statement_wizard_views.xml',
+        'wizard/commission_reversal_wizard_views.xml',
+        'wizard/commission_import_wizard_views.xml',
     ],
     'installable': True,
     'license': 'LGPL-3',
@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import json
+
+from odoo import http, _
+from odoo.fields import Datetime
+from odoo.http import request, Response
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _json_response(payload, status=200, headers=None):
+    return Response(
+        json.dumps(payload), status=status,
+        headers=[("Content-Type", "application/json")] + (headers or []),
+    )
+
+
+def _encode_cursor(key):
+    date_order, order_id = key
+    raw = json.dumps([Datetime.to_string(date_order), order_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    date_order, order_id = json.loads(raw)
+    return Datetime.to_datetime(date_order), int(order_id)
+
+
+class CommissionApiController(http.Controller):
+
+    @http.route("/reseller_commission/api/commissions", type="http", auth="user", methods=["GET"])
+    def agent_commissions(self, cursor=None, limit=None, fields=None, **kwargs):
+        """Read-only JSON feed of the commissions of the logged-in agent.
+
+        Pages are keyset pages on ``(date_order, id)``: ``next_cursor`` of a
+        response is the ``cursor`` of the next one. ``fields`` is a comma
+        separated subset of the columns. The ETag is the hash of the body,
+        a matching ``If-None-Match`` gets a 304.
+        """
+        # agent-nya partner user yang login (atau company-nya), bukan parameter
+        agent = request.env.user.partner_id.commercial_partner_id
+        if not agent.is_agent:
+            return _json_response({"error": _("User ini bukan agent")}, status=403)
+
+        SaleOrder = request.env["sale.order"].sudo()
+        columns = SaleOrder._get_commission_api_columns()
+        field_names = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(columns)
+        unknown = [name for name in field_names if name not in columns]
+        try:
+            limit = min(int(limit), MAX_LIMIT) if limit else DEFAULT_LIMIT
+            after = _decode_cursor(cursor) if cursor else None
+        except (ValueError, TypeError):
+            return _json_response({"error": _("limit / cursor ga valid")}, status=400)
+        if unknown or not field_names or limit <= 0:
+            return _json_response({
+                "error": _("Field ga dikenal: %s", ", ".join(unknown)) if unknown else _("limit / fields ga valid"),
+            }, status=400)
+
+        rows, next_key = SaleOrder._get_commission_api_page(agent.id, field_names, limit=limit, after=after)
+        body = json.dumps({
+            "data": rows,
+            "next_cursor": _encode_cursor(next_key) if next_key else None,
+        })
+        etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+        headers = [("ETag", etag), ("Cache-Control", "private, no-cache")]
+        if etag in request.httprequest.headers.get("If-None-Match", ""):
+            return Response(status=304, headers=headers)
+        return Response(body, headers=[("Content-Type", "application/json")] + headers)
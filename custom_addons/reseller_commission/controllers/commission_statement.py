@@ -0,0 +1,62 @@
+import logging
+
+from odoo import api, fields, http, _
+from odoo.exceptions import AccessError, UserError
+from odoo.http import request, Response, content_disposition
+
+_logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _stream_statement(registry, uid, context, *args):
+    # di-iterate sama werkzeug setelah cursor request udah ditutup,
+    # jadi pakai cursor sendiri selama streaming
+    with registry.cursor() as cr:
+        env = api.Environment(cr, uid, context)
+        try:
+            yield from env["sale.order"]._stream_commission_statement(*args)
+        except Exception:
+            _logger.exception("Export commission statement gagal di tengah jalan")
+            raise
+
+
+class CommissionStatementController(http.Controller):
+
+    @http.route("/reseller_commission/statement/<string:role>/<int:partner_id>", type="http", auth="user")
+    def commission_statement(self, role, partner_id, date_from=None, date_to=None, file_format="csv", **kwargs):
+        """Stream the commission statement of an agent or principal.
+
+        Rows are read by keyset pages on a cursor owned by the response, so
+        a statement over several years never sits in worker memory.
+        """
+        if role not in ("agent", "principal") or file_format not in CONTENT_TYPES:
+            raise request.not_found()
+        # query-nya SQL langsung, jadi cuma buat yang boleh liat semua SO
+        if not request.env.user.has_group("sales_team.group_sale_salesman_all_leads"):
+            raise AccessError(_("Statement komisi cuma buat sales yang bisa liat semua order"))
+        partner = request.env["res.partner"].browse(partner_id).exists()
+        if not partner:
+            raise request.not_found()
+        partner.check_access("read")
+
+        try:
+            date_to = fields.Date.to_date(date_to) if date_to else fields.Date.context_today(partner)
+            date_from = fields.Date.to_date(date_from) if date_from else date_to.replace(month=1, day=1)
+        except ValueError:
+            raise UserError(_("Format tanggal harus YYYY-MM-DD"))
+
+        context = dict(request.env.context, allowed_company_ids=request.env.companies.ids)
+        stream = _stream_statement(
+            request.env.registry, request.env.uid, context,
+            file_format, role, partner.id, date_from, date_to,
+        )
+        filename = f"commission-statement-{partner.name}-{date_from}-{date_to}.{file_format}"
+        return Response(stream, headers=[
+            ("Content-Type", CONTENT_TYPES[file_format]),
+            ("Content-Disposition", content_disposition(filename)),
+            ("X-Content-Type-Options", "nosniff"),
+        ], direct_passthrough=True)
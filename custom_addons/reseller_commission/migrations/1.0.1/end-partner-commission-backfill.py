@@ -0,0 +1,13 @@
+"""Migration: backfill res_partner.commission_rate in committed batches."""
+from odoo.addons.reseller_commission.tools import migration as mig
+from odoo.tools import SQL
+
+
+def migrate(cr, version):
+    legacy = mig.column_type(cr, "res_partner", "commission_rate_legacy")
+    assignment = SQL("commission_rate = COALESCE(commission_rate_legacy, 10.0)") if legacy \
+        else SQL("commission_rate = 10.0")
+    mig.backfill_in_batches(cr, "res_partner", assignment, SQL("commission_rate IS NULL"))
+
+    if legacy:
+        cr.execute("ALTER TABLE res_partner DROP COLUMN IF EXISTS commission_rate_legacy")
@@ -0,0 +1,33 @@
+"""Migration: prepare the res.partner commission columns without locking the table.
+
+The columns are added nullable and without default, so the ORM doesn't run
+its own full-table default UPDATE on them. The ``numeric`` commission_rate
+column created by the old 1.0.0 script is moved aside; its values are copied
+back in batches by the end script.
+"""
+import logging
+
+from odoo.addons.reseller_commission.tools import migration as mig
+from odoo.tools.sql import rename_column
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if mig.column_type(cr, "res_partner", "commission_rate") == "numeric":
+        _logger.info("res_partner.commission_rate is numeric, moving it to commission_rate_legacy")
+        rename_column(cr, "res_partner", "commission_rate", "commission_rate_legacy")
+
+    mig.add_column(cr, "res_partner", "is_agent", "boolean")
+    mig.add_column(cr, "res_partner", "is_principal", "boolean")
+    mig.add_column(cr, "res_partner", "commission_rate", "double precision")
+
+    # bikin sebelum module load, biar init() tinggal skip index yang udah ada
+    mig.create_index_concurrently(
+        cr, "res_partner_commission_agent_idx", "res_partner",
+        ["complete_name", "id"], where="is_agent",
+    )
+    mig.create_index_concurrently(
+        cr, "res_partner_commission_principal_idx", "res_partner",
+        ["complete_name", "id"], where="is_principal",
+    )
@@ -0,0 +1,29 @@
+"""Migration: build the sale_order commission indexes concurrently.
+
+``sale_order`` is the biggest table of the database, a plain ``CREATE
+INDEX`` from the module update would block writes on it for the whole
+build. The ``btree_not_null`` field indexes keep the name the ORM gives
+them, and ``init()`` skips every index already there.
+"""
+from odoo.addons.reseller_commission.tools import migration as mig
+
+
+def migrate(cr, version):
+    for column in ("agent_id", "principal_id", "commission_invoice_id"):
+        mig.create_index_concurrently(
+            cr, f"sale_order__{column}_index", "sale_order",
+            [column], where=f"{column} IS NOT NULL",
+        )
+    mig.create_index_concurrently(
+        cr, "sale_order_commission_open_idx", "sale_order",
+        ["principal_id", "company_id", "date_order"],
+        where="commission_status = 'confirmed' AND commission_invoice_id IS NULL",
+    )
+    mig.create_index_concurrently(
+        cr, "sale_order_agent_sale_agent_idx", "sale_order",
+        ["agent_id", "date_order", "id"], where="is_agent_sale",
+    )
+    mig.create_index_concurrently(
+        cr, "sale_order_agent_sale_principal_idx", "sale_order",
+        ["principal_id", "date_order", "id"], where="is_agent_sale",
+    )
@@ -0,0 +1,50 @@
+"""Migration: fill the per-line commission columns in committed batches.
+
+Stored ``commission_amount`` of the orders is kept as is, it is only split
+over the lines. Run the recompute wizard to apply the new base to orders
+that are not invoiced yet.
+"""
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.addons.reseller_commission.tools import migration as mig
+from odoo.tools import SQL, split_every
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    excluded = SQL("sale_order_line.display_type IS NOT NULL OR COALESCE(sale_order_line.is_downpayment, FALSE)")
+    if mig.column_type(cr, "sale_order_line", "is_delivery"):
+        excluded = SQL("%s OR COALESCE(sale_order_line.is_delivery, FALSE)", excluded)
+    mig.backfill_in_batches(cr, "sale_order_line", SQL("""
+        commission_base = CASE
+            WHEN %s THEN 0
+            WHEN EXISTS (SELECT 1 FROM sale_order so WHERE so.id = sale_order_line.order_id AND so.is_agent_sale)
+            THEN COALESCE(sale_order_line.price_subtotal, 0)
+            ELSE 0
+        END
+    """, excluded), SQL("commission_base IS NULL"))
+    mig.backfill_in_batches(cr, "sale_order", SQL("""
+        commission_base = (SELECT COALESCE(SUM(sol.commission_base), 0)
+                             FROM sale_order_line sol
+                            WHERE sol.order_id = sale_order.id)
+    """), SQL("commission_base IS NULL"))
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("""
+        SELECT DISTINCT sol.order_id
+          FROM sale_order_line sol
+          JOIN sale_order so ON so.id = sol.order_id
+         WHERE so.is_agent_sale AND sol.commission_amount IS NULL
+      ORDER BY sol.order_id
+    """)
+    order_ids = [row[0] for row in cr.fetchall()]
+    done = 0
+    for chunk in split_every(5000, order_ids, list):
+        env["sale.order"]._allocate_commission_lines_sql(chunk)
+        cr.commit()
+        done += len(chunk)
+        _logger.info(f"Alokasi komisi ke line: {done}/{len(order_ids)} order")
+
+    mig.backfill_in_batches(cr, "sale_order_line", SQL("commission_amount = 0"), SQL("commission_amount IS NULL"))
@@ -0,0 +1,14 @@
+"""Migration: add the per-line commission columns without letting the ORM compute them.
+
+A new stored computed column would be filled by the ORM record by record on
+every order line. The columns are created here empty instead, and the end
+script fills them with batched SQL.
+"""
+from odoo.addons.reseller_commission.tools import migration as mig
+
+
+def migrate(cr, version):
+    mig.add_column(cr, "sale_order_line", "commission_base", "numeric")
+    mig.add_column(cr, "sale_order_line", "commission_amount", "numeric")
+    mig.add_column(cr, "sale_order", "commission_base", "numeric")
+    mig.add_column(cr, "product_template", "commission_exclude", "boolean")
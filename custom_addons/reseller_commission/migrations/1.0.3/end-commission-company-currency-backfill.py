@@ -0,0 +1,35 @@
+"""Migration: lock the company currency rate of the agent sales already confirmed.
+
+Uses the rate of the order date, like a confirm would have, in committed
+batches. Safe to re-run, only orders without rate are picked up.
+
+No summary / ledger delta is written here: the summary is built by 1.0.4
+and the ledger by 1.0.7, both dated from the orders themselves.
+"""
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {"commission_skip_snapshot": True})
+    cr.execute("""
+        SELECT id FROM sale_order
+         WHERE is_agent_sale
+           AND commission_status != 'draft'
+           AND commission_currency_rate IS NULL
+      ORDER BY id
+    """)
+    order_ids = [row[0] for row in cr.fetchall()]
+    done = 0
+    for chunk in split_every(2000, order_ids, list):
+        orders = env["sale.order"].browse(chunk)
+        orders._write_commission_currency_rate()
+        env.flush_all()
+        cr.commit()
+        env.invalidate_all()
+        done += len(chunk)
+        _logger.info(f"Kurs komisi: {done}/{len(order_ids)} order")
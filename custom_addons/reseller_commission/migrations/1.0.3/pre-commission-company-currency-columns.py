@@ -0,0 +1,13 @@
+"""Migration: add the company currency commission columns empty.
+
+Filled only for confirmed agent sales by the end script, so the ORM doesn't
+compute them on every sale order. ``commission_currency_rate`` is a Float
+with ``digits``, which the ORM stores as ``numeric``: any other type gets
+altered on update, rewriting the whole table.
+"""
+from odoo.addons.reseller_commission.tools import migration as mig
+
+
+def migrate(cr, version):
+    mig.add_column(cr, "sale_order", "commission_currency_rate", "numeric")
+    mig.add_column(cr, "sale_order", "commission_amount_company", "numeric")
@@ -0,0 +1,7 @@
+"""Migration: build the commission summary from the existing agent sales."""
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["reseller.commission.summary"]._rebuild()
@@ -0,0 +1,21 @@
+"""Migration: build the trigram indexes of the agent / principal picker.
+
+Built concurrently before the module loads, so ``init()`` finds them valid
+and skips them. Without ``pg_trgm`` the picker keeps using the btree
+partial indexes.
+"""
+from odoo.addons.reseller_commission.tools import migration as mig
+from odoo.modules.db import has_trigram
+
+
+def migrate(cr, version):
+    if not has_trigram(cr):
+        return
+    mig.create_index_concurrently(
+        cr, "res_partner_commission_agent_trgm_idx", "res_partner",
+        ["complete_name gin_trgm_ops"], method="gin", where="is_agent",
+    )
+    mig.create_index_concurrently(
+        cr, "res_partner_commission_principal_trgm_idx", "res_partner",
+        ["complete_name gin_trgm_ops"], method="gin", where="is_principal",
+    )
@@ -0,0 +1,11 @@
+"""Migration: add the commission reversal columns empty.
+
+Nothing was reversed before this version, so the ORM doesn't need to
+compute them on every sale order.
+"""
+from odoo.addons.reseller_commission.tools import migration as mig
+
+
+def migrate(cr, version):
+    mig.add_column(cr, "sale_order", "commission_reversed_amount", "numeric")
+    mig.add_column(cr, "sale_order", "commission_reversed_amount_company", "numeric")
@@ -0,0 +1,7 @@
+"""Migration: backfill the commission ledger from the existing agent sales."""
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["reseller.commission.ledger"]._sync_from_orders()
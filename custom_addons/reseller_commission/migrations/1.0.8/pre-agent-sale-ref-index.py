@@ -0,0 +1,13 @@
+"""Migration: index the upstream reference of agent sales.
+
+The agent sale loader looks up ``client_order_ref`` for every chunk, so
+the partial index is built concurrently before ``init()`` runs.
+"""
+from odoo.addons.reseller_commission.tools import migration as mig
+
+
+def migrate(cr, version):
+    mig.create_index_concurrently(
+        cr, "sale_order_agent_sale_ref_idx", "sale_order",
+        ["client_order_ref"], where="is_agent_sale AND client_order_ref IS NOT NULL",
+    )
@@ -0,0 +1,16 @@
+"""Migration: index the paid status sync on the invoice side.
+
+The sync now starts from the invoices written since its watermark, so
+``account_move.write_date`` gets a partial index, built concurrently.
+``sale_order_commission_billed_idx`` only duplicated the index of
+``commission_invoice_id`` and is dropped.
+"""
+from odoo.addons.reseller_commission.tools import migration as mig
+
+
+def migrate(cr, version):
+    cr.execute('DROP INDEX IF EXISTS "sale_order_commission_billed_idx"')
+    mig.create_index_concurrently(
+        cr, "account_move_commission_sync_idx", "account_move",
+        ["write_date"], where="move_type = 'out_invoice'",
+    )
@@ -0,0 +1,26 @@
+"""Migration: rebuild the picker trigram indexes on the searched expression.
+
+With unaccent active the ORM searches ``unaccent(complete_name)``, which
+the plain ``complete_name`` indexes of 1.0.5 can't serve. The new indexes
+are built concurrently under a new name before the old ones are dropped.
+"""
+from odoo.addons.reseller_commission.models.res_partner import commission_trigram_expression
+from odoo.addons.reseller_commission.tools import migration as mig
+from odoo.modules.db import FunctionStatus, has_trigram
+from odoo.modules.registry import Registry
+
+
+def migrate(cr, version):
+    if not has_trigram(cr):
+        return
+    trigram = commission_trigram_expression(Registry(cr.dbname).has_unaccent == FunctionStatus.INDEXABLE)
+    mig.create_index_concurrently(
+        cr, "res_partner_commission_agent_name_trgm_idx", "res_partner",
+        [trigram], method="gin", where="is_agent",
+    )
+    mig.create_index_concurrently(
+        cr, "res_partner_commission_principal_name_trgm_idx", "res_partner",
+        [trigram], method="gin", where="is_principal",
+    )
+    cr.execute('DROP INDEX IF EXISTS "res_partner_commission_agent_trgm_idx"')
+    cr.execute('DROP INDEX IF EXISTS "res_partner_commission_principal_trgm_idx"')
@@ -1,2 +1,14 @@
+from . import account_account
+from . import account_move
+from . import product_template
+from . import res_company
+from . import res_config_settings
 from . import res_partner
-from . import sale_order
\ No newline at end of file
+from . import reseller_commission_ledger
+from . import reseller_commission_metric
+from . import reseller_commission_rate
+from . import reseller_commission_reversal_queue
+from . import reseller_commission_rule
+from . import reseller_commission_summary
+from . import sale_order
+from . import sale_order_line
@@ -0,0 +1,30 @@
+from odoo import models, api
+
+
+class AccountAccount(models.Model):
+    _inherit = "account.account"
+
+    # field yang ngaruh ke hasil SaleOrder._get_revenue_account_id
+    _COMMISSION_ACCOUNT_FIELDS = {"code", "account_type", "deprecated", "active", "company_ids"}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        accounts = super().create(vals_list)
+        # cuma account yang bisa kepilih (kode 41xx / income) yang bikin hasil cache basi
+        if any(
+            (account.code or "").startswith("41") or account.account_type == "income"
+            for account in accounts
+        ):
+            self.env.registry.clear_cache()
+        return accounts
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._COMMISSION_ACCOUNT_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
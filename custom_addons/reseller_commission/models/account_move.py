@@ -0,0 +1,58 @@
+from odoo import models, _
+from odoo.tools.sql import create_index
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def init(self):
+        super().init()
+        # sync status paid komisi scan invoice yang berubah sejak watermark
+        create_index(
+            self.env.cr, "account_move_commission_sync_idx", self._table,
+            ["write_date"],
+            where="move_type = 'out_invoice'",
+        )
+
+    def _post(self, soft=True):
+        posted = super()._post(soft)
+        posted._reverse_refunded_commission()
+        return posted
+
+    def _get_refunded_commission_amounts(self):
+        """Commission to reverse for the agent sales refunded by these moves.
+
+        Each refunded line takes back the commission of its sale order line
+        in proportion of the refunded subtotal.
+
+        :return: dict ``{order_id: amount}`` in order currency
+        """
+        amounts = {}
+        refunds = self.filtered(lambda m: m.move_type == "out_refund")
+        for line in refunds.invoice_line_ids:
+            for sol in line.sale_line_ids:
+                order = sol.order_id
+                if not order.is_agent_sale or order.commission_status not in ("invoiced", "paid"):
+                    continue
+                if sol.currency_id.is_zero(sol.commission_amount) or sol.currency_id.is_zero(sol.price_subtotal):
+                    continue
+                refunded = line.currency_id._convert(line.price_subtotal, sol.currency_id, line.company_id, line.date)
+                amounts[order.id] = amounts.get(order.id, 0.0) + sol.commission_amount * refunded / sol.price_subtotal
+        return amounts
+
+    def _reverse_refunded_commission(self):
+        # refund customer (sebagian / full) ngurangin komisi order-nya, credit note ke principal
+        amounts = self._get_refunded_commission_amounts()
+        if not amounts:
+            return
+        orders = self.env["sale.order"].sudo().browse(list(amounts))
+        refunds = ", ".join(self.filtered(lambda m: m.move_type == "out_refund").mapped("name"))
+        # order yang lagi di-lock ga bikin post refund gagal, masuk antrian reversal
+        _credit_notes, skipped = orders._create_commission_reversals(
+            amounts, reason=_("Refund %s", refunds), queue=True,
+        )
+        for order, reason in skipped.items():
+            _logger.warning(f"Reversal komisi dari refund skipped: {order.name} - {reason}")
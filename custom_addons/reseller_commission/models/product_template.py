@@ -0,0 +1,10 @@
+from odoo import models, fields
+
+
+class ProductTemplate(models.Model):
+    _inherit = "product.template"
+
+    commission_exclude = fields.Boolean(
+        string="Ga Kena Komisi",
+        help="Centang buat produk yang ga dihitung komisi agent (ongkir, biaya admin, dll)",
+    )
@@ -0,0 +1,19 @@
+from odoo import models, fields
+
+
+class ResCompany(models.Model):
+    _inherit = "res.company"
+
+    commission_revenue_account_id = fields.Many2one(
+        "account.account",
+        string="Commission Revenue Account",
+        check_company=True,
+        domain="[('deprecated', '=', False)]",
+        help="Account buat line invoice komisi. Kosongin buat cari otomatis (41xx / income)",
+    )
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "commission_revenue_account_id" in vals:
+            self.env.registry.clear_cache()
+        return res
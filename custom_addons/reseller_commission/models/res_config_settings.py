@@ -0,0 +1,14 @@
+from odoo import models, fields
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    commission_revenue_account_id = fields.Many2one(
+        related="company_id.commission_revenue_account_id",
+        readonly=False,
+    )
+    reseller_commission_instrumentation = fields.Boolean(
+        string="Commission Metrics",
+        config_parameter="reseller_commission.instrumentation",
+    )
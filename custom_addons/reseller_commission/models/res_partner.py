@@ -1,9 +1,23 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.modules.db import FunctionStatus, has_trigram
+from odoo.tools.sql import create_index
 import logging
 
 _logger = logging.getLogger(__name__)
 
+
+def commission_trigram_expression(unaccent_indexable):
+    """Trigram index expression of the agent / principal picker.
+
+    It has to match the ``complete_name`` ILIKE built by the ORM, which
+    wraps the column in ``unaccent`` when unaccent is active.
+    """
+    if unaccent_indexable:
+        return "unaccent(complete_name) gin_trgm_ops"
+    return "complete_name gin_trgm_ops"
+
+
 class ResPartner(models.Model):
     _inherit = 'res.partner'
 
@@ -23,6 +37,116 @@ class ResPartner(models.Model):
         help='Rate komisi default bila jadi agent',
     )
 
+    commission_rate_history_ids = fields.One2many(
+        'reseller.commission.rate', 'agent_id',
+        string='Commission Rate History',
+        help='Rate per periode (opsional per principal), menang dari rate default',
+    )
+
+    commission_kpi_currency_id = fields.Many2one(
+        'res.currency', compute='_compute_commission_kpis',
+    )
+    commission_open_amount = fields.Monetary(
+        string='Komisi Open', compute='_compute_commission_kpis',
+        currency_field='commission_kpi_currency_id',
+        help='Komisi confirmed yang belum di-invoice',
+    )
+    commission_invoiced_month_amount = fields.Monetary(
+        string='Komisi Invoiced Bulan Ini', compute='_compute_commission_kpis',
+        currency_field='commission_kpi_currency_id',
+    )
+    commission_paid_ytd_amount = fields.Monetary(
+        string='Komisi Paid YTD', compute='_compute_commission_kpis',
+        currency_field='commission_kpi_currency_id',
+    )
+
+    def init(self):
+        super().init()
+        # di db yang udah jalan index-nya dibikin CONCURRENTLY sama migration 1.0.1
+        create_index(
+            self.env.cr, "res_partner_commission_agent_idx", self._table,
+            ["complete_name", "id"], where="is_agent",
+        )
+        create_index(
+            self.env.cr, "res_partner_commission_principal_idx", self._table,
+            ["complete_name", "id"], where="is_principal",
+        )
+        # trigram buat picker agent / principal (ILIKE '%...%'), kalo pg_trgm ada
+        if has_trigram(self.env.cr):
+            trigram = commission_trigram_expression(self.env.registry.has_unaccent == FunctionStatus.INDEXABLE)
+            create_index(
+                self.env.cr, "res_partner_commission_agent_name_trgm_idx", self._table,
+                [trigram], method="gin", where="is_agent",
+            )
+            create_index(
+                self.env.cr, "res_partner_commission_principal_name_trgm_idx", self._table,
+                [trigram], method="gin", where="is_principal",
+            )
+
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        # picker agent_id / principal_id (domain is_agent / is_principal = True)
+        role = self._get_commission_picker_role(domain)
+        if role:
+            self = self.with_context(commission_picker_role=role)
+        return super(ResPartner, self).name_search(name, domain, operator, limit)
+
+    @api.model
+    def _search_display_name(self, operator, value):
+        # picker agent / principal: filter flag + complete_name aja
+        # (bukan OR ke email / ref / vat) biar kena index partial / trigram
+        role = self.env.context.get('commission_picker_role')
+        if not role or operator not in ('ilike', '=ilike') or not isinstance(value, str):
+            return super()._search_display_name(operator, value)
+        return [(role, '=', True), ('complete_name', operator, value)] if value else [(role, '=', True)]
+
+    @api.model
+    def _get_commission_picker_role(self, domain):
+        # cuma domain AND biasa yang ada leaf is_agent / is_principal = True
+        if not domain or any(isinstance(leaf, str) for leaf in domain):
+            return False
+        leaves = {tuple(leaf) for leaf in domain if isinstance(leaf, (list, tuple)) and len(leaf) == 3}
+        if ('is_agent', '=', True) in leaves:
+            return 'is_agent'
+        if ('is_principal', '=', True) in leaves:
+            return 'is_principal'
+        return False
+
+    def _compute_commission_kpis(self):
+        # dibaca dari summary komisi (per agent x principal x bulan), bukan scan sale_order
+        Summary = self.env['reseller.commission.summary']
+        self.env['sale.order'].flush_model()
+        company = self.env.company
+        today = fields.Date.context_today(self)
+        month_start, year_start = today.replace(day=1), today.replace(month=1, day=1)
+        kpis = {}
+        roles = (
+            ('agent_id', self.filtered('is_agent')),
+            ('principal_id', self.filtered(lambda p: p.is_principal and not p.is_agent)),
+        )
+        for role, partners in roles:
+            partner_ids = [partner.id for partner in partners if partner.id]
+            if not partner_ids:
+                continue
+            domain = [(role, 'in', partner_ids), ('company_id', '=', company.id)]
+            for partner, amount in Summary._read_group(domain, [role], ['amount_open:sum']):
+                kpis.setdefault(partner.id, [0.0, 0.0, 0.0])[0] = amount
+            groups = Summary._read_group(
+                domain + [('period', '>=', year_start)], [role, 'period:month'], ['amount_invoiced:sum', 'amount_paid:sum'],
+            )
+            for partner, period, invoiced, paid in groups:
+                values = kpis.setdefault(partner.id, [0.0, 0.0, 0.0])
+                if period == month_start:
+                    values[1] += invoiced
+                values[2] += paid
+
+        for partner in self:
+            values = kpis.get(partner.id, [0.0, 0.0, 0.0])
+            partner.commission_kpi_currency_id = company.currency_id
+            partner.commission_open_amount = values[0]
+            partner.commission_invoiced_month_amount = values[1]
+            partner.commission_paid_ytd_amount = values[2]
+
     @api.constrains('commission_rate')
     def _check_commission_rate(self):
         for p in self:
@@ -0,0 +1,23 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class ResellerCommissionMetric(models.Model):
+    _name = "reseller.commission.metric"
+    _description = "Commission Performance Metric"
+    _order = "id desc"
+
+    name = fields.Char(string="Operasi", required=True, readonly=True, index=True)
+    call_count = fields.Integer(string="Calls", readonly=True, default=1)
+    record_count = fields.Integer(string="Records", readonly=True)
+    duration_ms = fields.Float(string="Durasi (ms)", readonly=True, digits=(16, 1))
+    query_count = fields.Integer(string="Queries", readonly=True)
+
+    @api.model
+    def _gc_metrics(self):
+        # sample lama dibuang, default simpan 30 hari
+        days = int(self.env["ir.config_parameter"].sudo().get_param("reseller_commission.metric_retention_days", 30))
+        self.env.cr.execute(SQL(
+            "DELETE FROM %s WHERE create_date < (now() AT TIME ZONE 'UTC') - %s * interval '1 day'",
+            SQL.identifier(self._table), days,
+        ))
@@ -0,0 +1,91 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+
+class ResellerCommissionRate(models.Model):
+    _name = "reseller.commission.rate"
+    _description = "Commission Rate History"
+    _order = "agent_id, principal_id, valid_from desc"
+
+    agent_id = fields.Many2one(
+        "res.partner", string="Agent", required=True, ondelete="cascade",
+        domain="[('is_agent', '=', True)]",
+    )
+    principal_id = fields.Many2one(
+        "res.partner", string="Principal", ondelete="cascade",
+        domain="[('is_principal', '=', True)]",
+        help="Kosongin kalo rate berlaku buat semua principal",
+    )
+    valid_from = fields.Date(string="Berlaku Dari", required=True, default=fields.Date.today)
+    valid_to = fields.Date(string="Berlaku Sampai", help="Kosongin kalo masih berlaku")
+    rate = fields.Float(string="Commission Rate (%)", required=True)
+    active = fields.Boolean(default=True)
+
+    def init(self):
+        create_index(
+            self.env.cr, "reseller_commission_rate_lookup_idx", self._table,
+            ["agent_id", "principal_id", "valid_from"],
+        )
+
+    @api.constrains("rate")
+    def _check_rate(self):
+        for rec in self:
+            if not 0 <= rec.rate <= 100:
+                raise ValidationError(_("Commission rate harus 0-100%"))
+
+    @api.constrains("agent_id", "principal_id", "valid_from", "valid_to", "active")
+    def _check_period(self):
+        for rec in self:
+            if rec.valid_to and rec.valid_to < rec.valid_from:
+                raise ValidationError(_("Tanggal akhir harus setelah tanggal mulai"))
+        self.flush_model()
+        # periode buat agent + principal yang sama ga boleh tumpang tindih
+        self.env.cr.execute(SQL("""
+            SELECT r1.id
+              FROM reseller_commission_rate r1
+              JOIN reseller_commission_rate r2
+                ON r2.agent_id = r1.agent_id
+               AND r2.principal_id IS NOT DISTINCT FROM r1.principal_id
+               AND r2.id != r1.id
+               AND r2.active
+               AND daterange(r2.valid_from, r2.valid_to, '[]') && daterange(r1.valid_from, r1.valid_to, '[]')
+             WHERE r1.id = ANY(%s) AND r1.active
+             LIMIT 1
+        """, self.ids))
+        if self.env.cr.fetchone():
+            raise ValidationError(_("Periode rate komisi tumpang tindih sama rate lain"))
+
+    @api.model
+    def _get_rates(self, keys):
+        """Resolve the effective rates for many ``(agent_id, principal_id, date)`` at once.
+
+        A principal-specific rate wins over a generic one. Everything is
+        resolved with a single query, whatever the number of keys.
+
+        :return: dict ``{key: rate}``, keys without history are left out
+        """
+        keys = list({(agent_id, principal_id or None, day) for agent_id, principal_id, day in keys})
+        if not keys:
+            return {}
+        self.flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT k.agent_id, k.principal_id, k.day, r.rate
+              FROM unnest(%s::int[], %s::int[], %s::date[]) AS k(agent_id, principal_id, day)
+              JOIN LATERAL (
+                    SELECT rate
+                      FROM reseller_commission_rate r
+                     WHERE r.active
+                       AND r.agent_id = k.agent_id
+                       AND (r.principal_id = k.principal_id OR r.principal_id IS NULL)
+                       AND r.valid_from <= k.day
+                       AND (r.valid_to IS NULL OR r.valid_to >= k.day)
+                  ORDER BY r.principal_id IS NULL, r.valid_from DESC
+                     LIMIT 1
+                   ) r ON TRUE
+        """, [k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys]))
+        return {
+            (agent_id, principal_id, day): rate
+            for agent_id, principal_id, day, rate in self.env.cr.fetchall()
+        }
@@ -0,0 +1,87 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class ResellerCommissionReversalQueue(models.Model):
+    _name = "reseller.commission.reversal.queue"
+    _description = "Commission Reversal Queue"
+    _order = "id"
+
+    order_id = fields.Many2one("sale.order", string="Sales Order", required=True, readonly=True, ondelete="cascade", index=True)
+    currency_id = fields.Many2one(related="order_id.currency_id")
+    amount = fields.Monetary(string="Komisi", readonly=True, currency_field="currency_id")
+    reason = fields.Char(string="Referensi", readonly=True)
+    error = fields.Text(string="Error", readonly=True)
+
+    @api.model
+    def _enqueue(self, amounts, reason=None):
+        # reversal yang order-nya lagi di-lock transaksi lain, dikerjain cron nanti
+        if not amounts:
+            return self
+        rows = self.sudo().create([
+            {"order_id": order_id, "amount": amount, "reason": reason}
+            for order_id, amount in amounts.items()
+        ])
+        self.env.ref("reseller_commission.ir_cron_commission_reversal_queue")._trigger()
+        return rows
+
+    @api.model
+    def _process_queue(self, chunk_size=200, auto_commit=True):
+        """Run the queued commission reversals chunk by chunk.
+
+        Rows are claimed with ``FOR NO KEY UPDATE SKIP LOCKED`` and deleted once
+        their credit note is posted. Orders still locked elsewhere are queued
+        again for the next run, rejected ones keep the reason in ``error``.
+
+        :return: number of processed rows
+        """
+        self.flush_model(["error"])
+        self.env.cr.execute(SQL("SELECT MAX(id) FROM %s", SQL.identifier(self._table)))
+        max_id = self.env.cr.fetchone()[0]
+        processed, last_id = 0, 0
+        while max_id:
+            # baris yang di-antri ulang di run ini (id > max_id) nunggu run berikutnya
+            self.env.cr.execute(SQL("""
+                SELECT id FROM %s
+                 WHERE error IS NULL AND id > %s AND id <= %s
+                 ORDER BY id
+                 LIMIT %s
+                   FOR NO KEY UPDATE SKIP LOCKED
+            """, SQL.identifier(self._table), last_id, max_id, chunk_size))
+            row_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not row_ids:
+                break
+            last_id = row_ids[-1]
+
+            self.browse(row_ids)._process_chunk()
+            processed += len(row_ids)
+            if auto_commit:
+                self.env.cr.commit()
+            _logger.info(f"Antrian reversal komisi: {processed} baris diproses")
+        return processed
+
+    def _process_chunk(self):
+        by_reason = {}
+        for row in self:
+            amounts = by_reason.setdefault(row.reason, {})
+            amounts[row.order_id.id] = amounts.get(row.order_id.id, 0.0) + row.amount
+
+        errors = {}
+        for reason, amounts in by_reason.items():
+            orders = self.env["sale.order"].browse(list(amounts))
+            try:
+                with self.env.cr.savepoint():
+                    _credit_notes, skipped = orders._create_commission_reversals(amounts, reason=reason, queue=True)
+            except Exception as e:
+                _logger.exception("Reversal komisi dari antrian gagal")
+                skipped = dict.fromkeys(orders, str(e))
+            for order, error in skipped.items():
+                errors[(reason, order.id)] = error
+
+        failed = self.filtered(lambda row: (row.reason, row.order_id.id) in errors)
+        (self - failed).unlink()
+        for row in failed:
+            row.error = errors[(row.reason, row.order_id.id)]
@@ -0,0 +1,283 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+# rule yang udah di-compile, immutable biar aman disimpen di ormcache
+CompiledRule = namedtuple(
+    "CompiledRule", ["principal_id", "basis", "thresholds", "rates", "minimum", "cap", "categories"],
+)
+
+# field yang ngubah komisi, field lain (nama dll) ga perlu clear cache / recompute.
+# tier_ids / category_ids diurus write tier / kategori-nya sendiri
+RULE_AMOUNT_FIELDS = {"active", "agent_id", "principal_id", "tier_basis", "min_amount", "cap_amount"}
+TIER_AMOUNT_FIELDS = {"rule_id", "threshold", "rate"}
+CATEGORY_AMOUNT_FIELDS = {"rule_id", "categ_id", "rate"}
+
+
+class ResellerCommissionRule(models.Model):
+    _name = "reseller.commission.rule"
+    _description = "Commission Rule"
+    _order = "agent_id, principal_id"
+
+    name = fields.Char(required=True)
+    active = fields.Boolean(default=True)
+    agent_id = fields.Many2one(
+        "res.partner", string="Agent", required=True, ondelete="cascade",
+        domain="[('is_agent', '=', True)]",
+    )
+    principal_id = fields.Many2one(
+        "res.partner", string="Principal", ondelete="cascade",
+        domain="[('is_principal', '=', True)]",
+        help="Kosongin kalo rule berlaku buat semua principal",
+    )
+    tier_basis = fields.Selection(
+        [("order", "Per Order"), ("month", "Volume Bulanan")],
+        string="Dasar Tier", default="order", required=True,
+        help="Per Order: tier dari nilai SO itu aja. "
+             "Volume Bulanan: tier dari total SO confirmed agent di bulan yang sama.",
+    )
+    min_amount = fields.Float(string="Komisi Minimal", help="Komisi minimal per order, 0 = ga ada")
+    cap_amount = fields.Float(string="Komisi Maksimal", help="Komisi maksimal per order, 0 = ga ada")
+    tier_ids = fields.One2many("reseller.commission.rule.tier", "rule_id", string="Tiers", copy=True)
+    category_ids = fields.One2many("reseller.commission.rule.category", "rule_id", string="Rate per Kategori", copy=True)
+
+    _sql_constraints = [
+        ("agent_principal_uniq", "unique(agent_id, principal_id)", "Udah ada rule buat agent + principal ini"),
+    ]
+
+    @api.constrains("min_amount", "cap_amount")
+    def _check_amounts(self):
+        for rule in self:
+            if rule.cap_amount and rule.min_amount > rule.cap_amount:
+                raise ValidationError(_("Komisi minimal ga boleh lebih dari maksimal"))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        self.env.registry.clear_cache()
+        rules._recompute_open_orders()
+        return rules
+
+    def write(self, vals):
+        if not RULE_AMOUNT_FIELDS.intersection(vals):
+            return super().write(vals)
+        agents = self.agent_id
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        self._recompute_open_orders(agents)
+        return res
+
+    def unlink(self):
+        agents = self.agent_id
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        self.browse()._recompute_open_orders(agents)
+        return res
+
+    def _recompute_open_orders(self, agents=None):
+        # komisi order yang belum di-invoice ngikutin rule yang baru
+        agent_ids = (self.exists().agent_id | (agents or self.env["res.partner"])).ids
+        if agent_ids:
+            self.env["sale.order"]._recompute_commission_amount_sql([("agent_id", "in", agent_ids)])
+
+    @api.model
+    @tools.ormcache()
+    def _get_compiled_rules(self):
+        """Compile all active rules into lookup tables.
+
+        :return: dict ``{(agent_id, principal_id or None): CompiledRule}``
+        """
+        compiled = {}
+        for rule in self.sudo().search([]):
+            tiers = rule.tier_ids.sorted("threshold")
+            compiled[(rule.agent_id.id, rule.principal_id.id or None)] = CompiledRule(
+                principal_id=rule.principal_id.id or None,
+                basis=rule.tier_basis,
+                thresholds=tuple(tiers.mapped("threshold")),
+                rates=tuple(tiers.mapped("rate")),
+                minimum=rule.min_amount,
+                cap=rule.cap_amount,
+                categories=rule.category_ids._compile(),
+            )
+        return compiled
+
+    @api.model
+    def _get_rule(self, agent_id, principal_id):
+        rules = self._get_compiled_rules()
+        return rules.get((agent_id, principal_id or None)) or rules.get((agent_id, None))
+
+    @api.model
+    def _tier_amount(self, rule, base, volume_before=0.0):
+        # komisi progresif: tiap potongan volume kena rate tier-nya sendiri
+        if base <= 0 or not rule.thresholds:
+            return 0.0
+        pos, end = volume_before, volume_before + base
+        i = bisect_right(rule.thresholds, pos) - 1
+        amount = 0.0
+        while pos < end:
+            upper = rule.thresholds[i + 1] if i + 1 < len(rule.thresholds) else end
+            seg_end = min(end, upper)
+            if i >= 0:
+                amount += (seg_end - pos) * rule.rates[i] / 100.0
+            pos = seg_end
+            i += 1
+        return amount
+
+    @api.model
+    def _rule_amount(self, rule, base, category_bases=None, volume_before=0.0):
+        """Commission of one order under ``rule``.
+
+        :param base: commissionable amount of the order
+        :param category_bases: ``{categ_id: amount}`` part of ``base`` paid
+            with a category override instead of the tiers
+        :param volume_before: period volume before this order (month basis)
+        """
+        amount = 0.0
+        for categ_id, categ_base in (category_bases or {}).items():
+            amount += categ_base * rule.categories[categ_id] / 100.0
+            base -= categ_base
+        amount += self._tier_amount(rule, base, volume_before)
+        if rule.minimum and amount < rule.minimum:
+            amount = rule.minimum
+        if rule.cap and amount > rule.cap:
+            amount = rule.cap
+        return amount
+
+    @api.model
+    def _get_period_volumes(self, targets):
+        """Monthly volume of confirmed agent sales before each target order.
+
+        One windowed query per batch. ``targets`` is a list of
+        ``(key, agent_id, principal_id, date_order, amount)`` where ``amount``
+        is what the target itself adds to the volume (0 if not confirmed)
+        and ``key`` is the order id, or a negative number for new orders.
+
+        :return: dict ``{key: (volume_agent, volume_agent_principal)}``
+        """
+        if not targets:
+            return {}
+        self.env["sale.order"].flush_model(
+            ["is_agent_sale", "state", "agent_id", "principal_id", "date_order", "commission_base"],
+        )
+        keys, agents, principals, dates, amounts = zip(*targets)
+        self.env.cr.execute(SQL("""
+            WITH targets AS (
+                SELECT * FROM unnest(%s::int[], %s::int[], %s::int[], %s::timestamp[], %s::numeric[])
+                           AS t(key, agent_id, principal_id, date_order, amount)
+            ), volume AS (
+                SELECT so.id AS key, so.agent_id, so.principal_id, so.date_order, so.commission_base AS amount
+                  FROM sale_order so
+                 WHERE so.is_agent_sale
+                   AND so.state = 'sale'
+                   AND so.agent_id IN (SELECT agent_id FROM targets)
+                   AND so.date_order >= (SELECT date_trunc('month', MIN(date_order)) FROM targets)
+                   AND so.date_order < (SELECT date_trunc('month', MAX(date_order)) + interval '1 month' FROM targets)
+                   AND so.id NOT IN (SELECT key FROM targets)
+                UNION ALL
+                SELECT key, agent_id, principal_id, date_order, amount FROM targets
+            ), running AS (
+                SELECT key,
+                       SUM(amount) OVER (PARTITION BY agent_id, date_trunc('month', date_order)
+                                         ORDER BY date_order, key) - amount AS volume_agent,
+                       SUM(amount) OVER (PARTITION BY agent_id, principal_id, date_trunc('month', date_order)
+                                         ORDER BY date_order, key) - amount AS volume_principal
+                  FROM volume
+            )
+            SELECT key, volume_agent, volume_principal FROM running WHERE key = ANY(%s)
+        """, list(keys), list(agents), list(principals), list(dates), list(amounts), list(keys)))
+        return {
+            key: (float(volume_agent), float(volume_principal))
+            for key, volume_agent, volume_principal in self.env.cr.fetchall()
+        }
+
+
+class ResellerCommissionRuleTier(models.Model):
+    _name = "reseller.commission.rule.tier"
+    _description = "Commission Rule Tier"
+    _order = "rule_id, threshold"
+
+    rule_id = fields.Many2one("reseller.commission.rule", required=True, ondelete="cascade", index=True)
+    threshold = fields.Float(string="Dari Volume", required=True, default=0.0)
+    rate = fields.Float(string="Rate (%)", required=True)
+
+    @api.constrains("rate", "threshold")
+    def _check_rate(self):
+        for tier in self:
+            if not 0 <= tier.rate <= 100:
+                raise ValidationError(_("Commission rate harus 0-100%"))
+            if tier.threshold < 0:
+                raise ValidationError(_("Volume tier ga boleh negatif"))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tiers = super().create(vals_list)
+        self.env.registry.clear_cache()
+        tiers.rule_id._recompute_open_orders()
+        return tiers
+
+    def write(self, vals):
+        if not TIER_AMOUNT_FIELDS.intersection(vals):
+            return super().write(vals)
+        rules = self.rule_id
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        (rules | self.rule_id)._recompute_open_orders()
+        return res
+
+    def unlink(self):
+        rules = self.rule_id
+        agents = rules.agent_id
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        rules._recompute_open_orders(agents)
+        return res
+
+
+class ResellerCommissionRuleCategory(models.Model):
+    _name = "reseller.commission.rule.category"
+    _description = "Commission Rule Category Rate"
+
+    rule_id = fields.Many2one("reseller.commission.rule", required=True, ondelete="cascade", index=True)
+    categ_id = fields.Many2one("product.category", string="Kategori Produk", required=True)
+    rate = fields.Float(string="Rate (%)", required=True)
+
+    @api.constrains("rate")
+    def _check_rate(self):
+        for line in self:
+            if not 0 <= line.rate <= 100:
+                raise ValidationError(_("Commission rate harus 0-100%"))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env.registry.clear_cache()
+        lines.rule_id._recompute_open_orders()
+        return lines
+
+    def write(self, vals):
+        if not CATEGORY_AMOUNT_FIELDS.intersection(vals):
+            return super().write(vals)
+        rules = self.rule_id
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        (rules | self.rule_id)._recompute_open_orders()
+        return res
+
+    def unlink(self):
+        rules = self.rule_id
+        agents = rules.agent_id
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        rules._recompute_open_orders(agents)
+        return res
+
+    def _compile(self):
+        # rate kategori juga berlaku buat sub-kategori, override paling spesifik menang
+        rates = {}
+        for line in self.sorted(lambda l: len(l.categ_id.parent_path or ""), reverse=True):
+            for categ in self.env["product.category"].search([("id", "child_of", line.categ_id.id)]):
+                rates.setdefault(categ.id, line.rate)
+        return rates
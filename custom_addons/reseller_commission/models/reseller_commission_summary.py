@@ -0,0 +1,195 @@
+import logging
+
+from odoo import models, fields, api, _
+from odoo.tools import SQL
+from odoo.tools.sql import create_unique_index
+
+_logger = logging.getLogger(__name__)
+
+# field sale.order yang ngaruh ke summary
+SUMMARY_ORDER_FIELDS = {
+    "is_agent_sale", "agent_id", "principal_id", "company_id", "state", "date_order",
+    "commission_status", "commission_amount_company", "commission_invoice_id", "commission_paid_date",
+    "commission_reversed_amount_company",
+}
+
+
+class ResellerCommissionSummary(models.Model):
+    _name = "reseller.commission.summary"
+    _description = "Commission Summary"
+    _order = "period desc, agent_id, principal_id"
+    _rec_name = "period"
+
+    agent_id = fields.Many2one("res.partner", string="Agent", required=True, readonly=True, ondelete="cascade", index=True)
+    principal_id = fields.Many2one("res.partner", string="Principal", readonly=True, ondelete="cascade", index="btree_not_null")
+    company_id = fields.Many2one("res.company", string="Company", required=True, readonly=True, ondelete="cascade")
+    currency_id = fields.Many2one(related="company_id.currency_id")
+    period = fields.Date(string="Bulan", required=True, readonly=True)
+    amount_open = fields.Monetary(
+        string="Komisi Open", readonly=True,
+        help="Komisi confirmed yang belum di-invoice, per bulan order",
+    )
+    amount_invoiced = fields.Monetary(
+        string="Komisi Invoiced", readonly=True,
+        help="Komisi yang di-invoice (termasuk yang udah paid), per bulan invoice",
+    )
+    amount_paid = fields.Monetary(
+        string="Komisi Paid", readonly=True,
+        help="Komisi yang udah dibayar, per bulan lunas",
+    )
+
+    def init(self):
+        super().init()
+        # key buat upsert delta, principal boleh kosong
+        create_unique_index(
+            self.env.cr, "reseller_commission_summary_key_idx", self._table,
+            ["agent_id", "COALESCE(principal_id, 0)", "company_id", "period"],
+        )
+
+    @api.model
+    def _contribution_query(self, where):
+        # tiap order nyumbang ke max 3 baris: open (bulan order),
+        # invoiced (bulan invoice) dan paid (bulan lunas), semua di currency company.
+        # invoiced / paid udah dikurangin komisi yang di-credit note (refund sebagian)
+        return SQL("""
+            SELECT so.agent_id, COALESCE(so.principal_id, 0), so.company_id, c.period,
+                   SUM(c.amount_open), SUM(c.amount_invoiced), SUM(c.amount_paid)
+              FROM sale_order so
+         LEFT JOIN account_move am ON am.id = so.commission_invoice_id
+                   CROSS JOIN LATERAL (VALUES
+                       (date_trunc('month', so.date_order)::date,
+                        CASE WHEN so.commission_status = 'confirmed' THEN so.commission_amount_company ELSE 0 END, 0, 0),
+                       (date_trunc('month', COALESCE(am.invoice_date, so.date_order))::date,
+                        0, CASE WHEN so.commission_status IN ('invoiced', 'paid')
+                             THEN so.commission_amount_company - COALESCE(so.commission_reversed_amount_company, 0) ELSE 0 END, 0),
+                       (date_trunc('month', so.commission_paid_date)::date,
+                        0, 0, CASE WHEN so.commission_status = 'paid'
+                             THEN so.commission_amount_company - COALESCE(so.commission_reversed_amount_company, 0) ELSE 0 END)
+                   ) AS c(period, amount_open, amount_invoiced, amount_paid)
+             WHERE so.is_agent_sale
+               AND so.agent_id IS NOT NULL
+               AND so.state != 'cancel'
+               AND c.period IS NOT NULL
+               AND %s
+          GROUP BY 1, 2, 3, 4
+            HAVING SUM(c.amount_open) != 0 OR SUM(c.amount_invoiced) != 0 OR SUM(c.amount_paid) != 0
+        """, where)
+
+    @api.model
+    def _get_contributions(self, order_ids):
+        """What the given orders currently add to the summary, read from the db.
+
+        :return: dict ``{(agent_id, principal_id or 0, company_id, period): (open, invoiced, paid)}``
+        """
+        if not order_ids:
+            return {}
+        self.env.cr.execute(self._contribution_query(SQL("so.id = ANY(%s)", list(order_ids))))
+        return {tuple(row[:4]): tuple(float(amount or 0.0) for amount in row[4:]) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _apply_delta(self, before, after):
+        """Add ``after - before`` to the summary rows, with one upsert."""
+        deltas = []
+        for key in before.keys() | after.keys():
+            old = before.get(key, (0.0, 0.0, 0.0))
+            new = after.get(key, (0.0, 0.0, 0.0))
+            delta = tuple(n - o for n, o in zip(new, old))
+            if any(delta):
+                deltas.append(key + delta)
+        if not deltas:
+            return
+        agents, principals, companies, periods, opens, invoiced, paid = zip(*deltas)
+        self.env.cr.execute(SQL("""
+            INSERT INTO reseller_commission_summary (
+                agent_id, principal_id, company_id, period, amount_open, amount_invoiced, amount_paid,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT agent_id, NULLIF(principal_id, 0), company_id, period, amount_open, amount_invoiced, amount_paid,
+                   %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+              FROM unnest(%(agents)s::int[], %(principals)s::int[], %(companies)s::int[], %(periods)s::date[],
+                          %(opens)s::numeric[], %(invoiced)s::numeric[], %(paid)s::numeric[])
+                   AS d(agent_id, principal_id, company_id, period, amount_open, amount_invoiced, amount_paid)
+                ON CONFLICT (agent_id, COALESCE(principal_id, 0), company_id, period) DO UPDATE
+               SET amount_open = reseller_commission_summary.amount_open + EXCLUDED.amount_open,
+                   amount_invoiced = reseller_commission_summary.amount_invoiced + EXCLUDED.amount_invoiced,
+                   amount_paid = reseller_commission_summary.amount_paid + EXCLUDED.amount_paid,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, uid=self.env.uid, agents=list(agents), principals=list(principals), companies=list(companies),
+            periods=list(periods), opens=list(opens), invoiced=list(invoiced), paid=list(paid)))
+        self.invalidate_model()
+
+    @api.model
+    def _verify(self):
+        """Compare the summary with a full aggregation of ``sale_order``.
+
+        :return: dict ``{key: (expected, stored)}`` of the rows that differ
+        """
+        self.env["sale.order"].flush_model()
+        self.env["account.move"].flush_model(["invoice_date"])
+        self.flush_model()
+        self.env.cr.execute(self._contribution_query(SQL("TRUE")))
+        expected = {tuple(row[:4]): tuple(float(amount or 0.0) for amount in row[4:]) for row in self.env.cr.fetchall()}
+        self.env.cr.execute("""
+            SELECT agent_id, COALESCE(principal_id, 0), company_id, period, amount_open, amount_invoiced, amount_paid
+              FROM reseller_commission_summary
+        """)
+        stored = {tuple(row[:4]): tuple(float(amount or 0.0) for amount in row[4:]) for row in self.env.cr.fetchall()}
+
+        mismatches = {}
+        zero = (0.0, 0.0, 0.0)
+        for key in expected.keys() | stored.keys():
+            exp, got = expected.get(key, zero), stored.get(key, zero)
+            # beda di bawah 1 sen dianggap sama (pembulatan numeric vs float)
+            if any(abs(e - g) >= 0.005 for e, g in zip(exp, got)):
+                mismatches[key] = (exp, got)
+        return mismatches
+
+    @api.model
+    def _rebuild(self):
+        """Rebuild the whole summary from ``sale_order`` after verifying it.
+
+        The table is locked for the rebuild so no delta gets lost in
+        between. Mismatches found before the rebuild are logged.
+
+        :return: number of rows that didn't match
+        """
+        self.env.cr.execute(SQL("LOCK TABLE %s IN EXCLUSIVE MODE", SQL.identifier(self._table)))
+        mismatches = self._verify()
+        for key, (expected, stored) in list(mismatches.items())[:20]:
+            _logger.warning(f"Summary komisi beda di {key}: harusnya {expected}, tersimpan {stored}")
+
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        self.env.cr.execute(SQL("""
+            INSERT INTO reseller_commission_summary (
+                agent_id, principal_id, company_id, period, amount_open, amount_invoiced, amount_paid,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT agent_id, NULLIF(principal_id, 0), company_id, period, amount_open, amount_invoiced, amount_paid,
+                   %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC'
+              FROM (%s) AS src(agent_id, principal_id, company_id, period, amount_open, amount_invoiced, amount_paid)
+        """, self.env.uid, self.env.uid, self._contribution_query(SQL("TRUE"))))
+        self.invalidate_model()
+        _logger.info(f"Summary komisi di-rebuild: {self.env.cr.rowcount} baris, {len(mismatches)} beda")
+        return len(mismatches)
+
+    @api.model
+    def action_rebuild(self):
+        mismatches = self._rebuild()
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Rebuild Summary Komisi"),
+                "message": _("%(count)s baris summary beda dari data order dan udah dibenerin.", count=mismatches)
+                if mismatches else _("Summary cocok sama data order."),
+                "type": "warning" if mismatches else "success",
+                "next": {"type": "ir.actions.client", "tag": "reload"},
+            },
+        }
+
+    @api.model
+    def _cron_verify(self):
+        # rebuild cuma kalo ada yang beda
+        if self._verify():
+            self._rebuild()
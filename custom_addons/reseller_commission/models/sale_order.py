@@ -1,9 +1,28 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, Command, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+from odoo.tools import SQL, split_every
+from odoo.tools.sql import create_index
+import csv
+import io
+import json
 import logging
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+import xlsxwriter
+
+from ..tools.instrumentation import instrument
+from .reseller_commission_summary import SUMMARY_ORDER_FIELDS
+
+from psycopg2.errors import LockNotAvailable
 
 _logger = logging.getLogger(__name__)
 
+# field yang ngubah volume bulanan agent (tier rule "Volume Bulanan")
+COMMISSION_PERIOD_FIELDS = {"state", "is_agent_sale", "agent_id", "principal_id", "date_order"}
+
 class SaleOrder(models.Model):
     _inherit = "sale.order"
 
@@ -16,27 +35,113 @@ class SaleOrder(models.Model):
         string="Agent",
         domain="[('is_agent', '=', True)]",
         help="The agent/reseller facilitating this sale",
+        index="btree_not_null",
     )
     principal_id = fields.Many2one(
         "res.partner", string="Principal",
         domain="[('is_principal', '=', True)]",
+        index="btree_not_null",
     )
     commission_rate = fields.Float(
         string="Commission Rate (%)", default=0.0,
     )
+    commission_rate_auto = fields.Boolean(
+        string="Rate Otomatis", copy=False,
+        help="Rate diambil dari history rate / agent, di-update lagi pas confirm sesuai tanggal order",
+    )
+    commission_base = fields.Monetary(
+        string="Dasar Komisi",
+        compute="_compute_commission_base", store=True,
+        currency_field="currency_id",
+        help="Total dasar komisi dari line (tanpa ongkir, down payment, produk non komisi)",
+    )
     commission_amount = fields.Monetary(
         string="Commission Amount",
         compute="_compute_commission", store=True,
         currency_field="currency_id",
     )
+    commission_company_currency_id = fields.Many2one(
+        related="company_id.currency_id", string="Company Currency",
+    )
+    commission_currency_rate = fields.Float(
+        string="Kurs Komisi", digits=0, readonly=True, copy=False,
+        help="Kurs currency order ke currency company di tanggal order, dikunci pas confirm",
+    )
+    commission_amount_company = fields.Monetary(
+        string="Komisi (Currency Company)",
+        compute="_compute_commission_amount_company", store=True,
+        currency_field="commission_company_currency_id",
+    )
     commission_status = fields.Selection(
-        [("draft", "Draft"), ("confirmed", "Confirmed"), ("invoiced", "Invoiced"), ("paid", "Paid")],
+        [("draft", "Draft"), ("confirmed", "Confirmed"), ("invoiced", "Invoiced"), ("paid", "Paid"),
+         ("reversed", "Reversed")],
         default="draft", copy=False, readonly=True,
     )
     commission_invoice_id = fields.Many2one(
         "account.move", string="Commission Invoice", readonly=True, copy=False,
+        index="btree_not_null",
+    )
+    commission_paid_date = fields.Date(
+        string="Commission Paid Date", readonly=True, copy=False,
+    )
+    commission_reversed_amount = fields.Monetary(
+        string="Komisi Di-reverse", readonly=True, copy=False,
+        currency_field="currency_id",
+        help="Total komisi yang udah di-credit note (cancel / refund customer)",
+    )
+    commission_reversed_amount_company = fields.Monetary(
+        string="Komisi Di-reverse (Currency Company)",
+        compute="_compute_commission_reversed_amount_company", store=True,
+        currency_field="commission_company_currency_id",
+    )
+    commission_reversal_ids = fields.Many2many(
+        "account.move", "sale_order_commission_reversal_rel", "order_id", "move_id",
+        string="Credit Note Komisi", readonly=True, copy=False,
+    )
+    commission_invoice_queued = fields.Boolean(
+        string="Antri Invoice Komisi", readonly=True, copy=False,
+        help="Invoice komisi bakal dibikin di background sama cron",
+    )
+    commission_invoice_error = fields.Text(
+        string="Error Invoice Komisi", readonly=True, copy=False,
     )
 
+    def init(self):
+        super().init()
+        # partial index buat query komisi yang paling sering:
+        # "confirmed tapi belum di-invoice", statement per agent / per principal
+        create_index(
+            self.env.cr, "sale_order_commission_open_idx", self._table,
+            ["principal_id", "company_id", "date_order"],
+            where="commission_status = 'confirmed' AND commission_invoice_id IS NULL",
+        )
+        create_index(
+            self.env.cr, "sale_order_agent_sale_agent_idx", self._table,
+            ["agent_id", "date_order", "id"],
+            where="is_agent_sale",
+        )
+        create_index(
+            self.env.cr, "sale_order_agent_sale_principal_idx", self._table,
+            ["principal_id", "date_order", "id"],
+            where="is_agent_sale",
+        )
+        create_index(
+            self.env.cr, "sale_order_commission_queue_idx", self._table,
+            ["id"],
+            where="commission_invoice_queued",
+        )
+        create_index(
+            self.env.cr, "sale_order_commission_paid_idx", self._table,
+            ["agent_id", "commission_paid_date"],
+            where="commission_status = 'paid'",
+        )
+        # loader agent sale dedupe pakai client_order_ref (referensi upstream)
+        create_index(
+            self.env.cr, "sale_order_agent_sale_ref_idx", self._table,
+            ["client_order_ref"],
+            where="is_agent_sale AND client_order_ref IS NOT NULL",
+        )
+
     @api.onchange("is_agent_sale")
     def _onchange_is_agent_sale(self):
         # reset fields kalo di-uncheck
@@ -48,111 +153,1507 @@ class SaleOrder(models.Model):
 
     @api.onchange("agent_id")
     def _onchange_agent_id_set_rate(self):
-        # auto isi rate dari agent
-        if self.agent_id and self.agent_id.commission_rate > 0:
-            self.commission_rate = self.agent_id.commission_rate
+        # auto isi rate dari agent (history rate dulu, kalo ga ada rate di partner)
+        if self.agent_id:
+            key = self._get_commission_rate_key(
+                self.agent_id._origin.id, self.principal_id._origin.id, self.date_order,
+            )
+            rate = self._get_agent_commission_rates([key])[key]
+            if rate > 0:
+                self.commission_rate = rate
+                self.commission_rate_auto = True
+
+    @api.model
+    def _get_commission_rate_key(self, agent_id, principal_id, date_order):
+        day = fields.Datetime.to_datetime(date_order).date() if date_order else fields.Date.today()
+        return (agent_id, principal_id or None, day)
+
+    @api.model
+    def _get_agent_commission_rates(self, keys):
+        """Resolve the agent rate for many ``(agent_id, principal_id, date)`` keys.
+
+        The rate history wins, the partner ``commission_rate`` is the
+        fallback. One query for the history and one prefetch of the partner
+        rates per batch, whatever the number of keys.
 
-    @api.depends("amount_untaxed", "commission_rate", "is_agent_sale")
+        :return: dict ``{key: rate}`` with every requested key
+        """
+        keys = set(keys)
+        rates = self.env["reseller.commission.rate"]._get_rates(keys)
+        missing = keys.difference(rates)
+        if missing:
+            agents = self.env["res.partner"].browse({key[0] for key in missing})
+            partner_rates = {agent.id: agent.commission_rate for agent in agents}
+            for key in missing:
+                rates[key] = partner_rates[key[0]]
+        return rates
+
+    @api.model
+    def _fill_commission_rate(self, vals_list):
+        # sama kayak onchange agent_id, buat import / RPC yang ga jalanin onchange
+        todo = [
+            (vals, self._get_commission_rate_key(vals["agent_id"], vals.get("principal_id"), vals.get("date_order")))
+            for vals in vals_list
+            if vals.get("agent_id") and "commission_rate" not in vals
+        ]
+        if not todo:
+            return
+        rates = self._get_agent_commission_rates(key for _vals, key in todo)
+        for vals, key in todo:
+            if rates[key] > 0:
+                vals["commission_rate"] = rates[key]
+                vals["commission_rate_auto"] = True
+
+    def _refresh_auto_commission_rate(self, date_order=None):
+        # order yang rate-nya otomatis ikut rate yang berlaku di tanggal order
+        orders = self.filtered(lambda o: o.is_agent_sale and o.agent_id and o.commission_rate_auto)
+        if not orders:
+            return
+        keys = {
+            order: self._get_commission_rate_key(
+                order.agent_id.id, order.principal_id.id, date_order or order.date_order,
+            )
+            for order in orders
+        }
+        rates = self._get_agent_commission_rates(keys.values())
+        by_rate = {}
+        for order, key in keys.items():
+            if rates[key] > 0 and rates[key] != order.commission_rate:
+                by_rate.setdefault(rates[key], []).append(order.id)
+        for rate, order_ids in by_rate.items():
+            self.browse(order_ids).write({"commission_rate": rate, "commission_rate_auto": True})
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._fill_commission_rate(vals_list)
+        return super().create(vals_list)
+
+    def write(self, vals):
+        # tier volume bulanan: order lain di agent + bulan yang sama ikut berubah komisinya
+        periods = self._get_commission_periods() if COMMISSION_PERIOD_FIELDS.intersection(vals) else None
+        res = self._write_commission_rate(vals)
+        if periods is not None:
+            self._recompute_commission_periods(periods | self._get_commission_periods())
+        return res
+
+    def _write_commission_rate(self, vals):
+        if "commission_rate" in vals:
+            if "commission_rate_auto" not in vals:
+                vals = dict(vals, commission_rate_auto=False)
+        elif vals.get("agent_id"):
+            # rate bisa beda per order (principal / tanggal), jadi write per rate
+            by_rate = {}
+            for order in self:
+                key = self._get_commission_rate_key(
+                    vals["agent_id"], vals.get("principal_id", order.principal_id.id), order.date_order,
+                )
+                by_rate.setdefault(key, []).append(order.id)
+            rates = self._get_agent_commission_rates(by_rate)
+            for key, order_ids in by_rate.items():
+                rate_vals = {"commission_rate": rates[key], "commission_rate_auto": True} if rates[key] > 0 else {}
+                super(SaleOrder, self.browse(order_ids)).write(dict(vals, **rate_vals))
+            return True
+        return super().write(vals)
+
+    def _get_commission_periods(self):
+        """Agent months whose volume tiers depend on these orders.
+
+        :return: set of ``(agent_id, month start)``, only for agents with a
+            monthly volume rule
+        """
+        Rule = self.env["reseller.commission.rule"]
+        agent_ids = {
+            agent_id for (agent_id, _principal_id), rule in Rule._get_compiled_rules().items()
+            if rule.basis == "month"
+        }
+        if not agent_ids:
+            return set()
+        return {
+            (order.agent_id.id, fields.Datetime.start_of(order.date_order, "month"))
+            for order in self
+            if order.is_agent_sale and order.agent_id.id in agent_ids and order.date_order
+        }
+
+    @api.model
+    def _recompute_commission_periods(self, periods):
+        # komisi order yang belum di-invoice di periode itu di-compute ulang sama ORM
+        if not periods:
+            return
+        Rule = self.env["reseller.commission.rule"]
+        Line = self.env["sale.order.line"]
+        orders = self.search(expression.AND([
+            [
+                ("is_agent_sale", "=", True),
+                ("commission_invoice_id", "=", False),
+                ("commission_status", "in", ("draft", "confirmed")),
+            ],
+            expression.OR([
+                [
+                    ("agent_id", "=", agent_id),
+                    ("date_order", ">=", start),
+                    ("date_order", "<", fields.Datetime.add(start, months=1)),
+                ]
+                for agent_id, start in periods
+            ]),
+        ]))
+        orders = orders.filtered(
+            lambda o: getattr(Rule._get_rule(o.agent_id.id, o.principal_id.id), "basis", None) == "month"
+        )
+        if orders:
+            self.env.add_to_compute(self._fields["commission_amount"], orders)
+            self.env.add_to_compute(self._fields["commission_amount_company"], orders)
+            self.env.add_to_compute(Line._fields["commission_amount"], orders.order_line)
+
+    @api.model
+    def _get_commission_snapshot(self, order_ids):
+        # posisi komisi order di db buat summary + ledger, dibandingin sebelum / sesudah
+        return (
+            self.env["reseller.commission.summary"]._get_contributions(order_ids),
+            self.env["reseller.commission.ledger"]._get_positions(order_ids),
+        )
+
+    @api.model
+    def _apply_commission_snapshot(self, before, after):
+        self.env["reseller.commission.summary"]._apply_delta(before[0], after[0])
+        self.env["reseller.commission.ledger"]._append_delta(before[1], after[1])
+
+    @api.model
+    def _create(self, data_list):
+        records = super()._create(data_list)
+        if not self.env.context.get("commission_skip_snapshot"):
+            self._apply_commission_snapshot(({}, {}), self._get_commission_snapshot(records.ids))
+        return records
+
+    def _write_multi(self, vals_list):
+        # summary + ledger komisi di-update pakai delta nilai di db sebelum / sesudah,
+        # jalan juga buat field computed yang di-flush.
+        # commission_skip_snapshot: migration yang nanti rebuild summary / ledger sendiri
+        if self.env.context.get("commission_skip_snapshot") or not any(
+            SUMMARY_ORDER_FIELDS.intersection(vals) for vals in vals_list
+        ) or (
+            not any(self.mapped("is_agent_sale")) and not any("is_agent_sale" in vals for vals in vals_list)
+        ):
+            return super()._write_multi(vals_list)
+        before = self._get_commission_snapshot(self.ids)
+        res = super()._write_multi(vals_list)
+        self._apply_commission_snapshot(before, self._get_commission_snapshot(self.ids))
+        return res
+
+    def unlink(self):
+        self.flush_recordset()
+        # ditutup sebelum hapus, baris ledger masih nunjuk ke order-nya
+        self._apply_commission_snapshot(self._get_commission_snapshot(self.ids), ({}, {}))
+        return super().unlink()
+
+    @api.depends("order_line.commission_base")
+    def _compute_commission_base(self):
+        # total dari line pakai satu query aggregate, bukan loop semua line
+        saved = self.filtered("id")
+        bases = {}
+        if saved:
+            bases = dict(self.env["sale.order.line"].sudo()._read_group(
+                [("order_id", "in", saved.ids)], ["order_id"], ["commission_base:sum"],
+            ))
+        for order in self:
+            if order.id:
+                order.commission_base = bases.get(order, 0.0)
+            else:
+                # order baru (onchange) belum ada di db
+                order.commission_base = sum(order.order_line.mapped("commission_base"))
+
+    @api.depends("commission_base", "commission_rate", "is_agent_sale", "agent_id", "principal_id", "date_order")
+    @instrument("compute_commission")
     def _compute_commission(self):
+        Rule = self.env["reseller.commission.rule"]
+        ruled = {}
         for order in self:
+            rule = order.is_agent_sale and order.agent_id and Rule._get_rule(order.agent_id.id, order.principal_id.id)
+            if rule:
+                ruled[order] = rule
+                continue
             amt = 0
             if order.is_agent_sale and order.commission_rate > 0:
-                amt = order.amount_untaxed * (order.commission_rate / 100.0)
+                amt = order.commission_base * (order.commission_rate / 100.0)
             order.commission_amount = amt
+        if ruled:
+            self._compute_commission_rules(ruled)
+
+    def _compute_commission_rules(self, ruled):
+        # order yang punya rule (tier / kategori / min / cap), semua lookup sekali per batch
+        Rule = self.env["reseller.commission.rule"]
+        category_bases = self._get_commission_category_bases(
+            {order: rule for order, rule in ruled.items() if rule.categories}
+        )
+        keys = {}
+        targets = []
+        for order, rule in ruled.items():
+            if rule.basis != "month":
+                continue
+            keys[order] = order._origin.id or -len(keys) - 1
+            targets.append((
+                keys[order], order.agent_id.id, order.principal_id.id or None,
+                order.date_order or fields.Datetime.now(),
+                order.commission_base if order.state == "sale" else 0.0,
+            ))
+        volumes = Rule._get_period_volumes(targets)
+
+        for order, rule in ruled.items():
+            volume = 0.0
+            if order in keys:
+                volume_agent, volume_principal = volumes[keys[order]]
+                volume = volume_principal if rule.principal_id else volume_agent
+            order.commission_amount = Rule._rule_amount(
+                rule, order.commission_base, category_bases.get(order), volume,
+            )
+
+    @api.depends("commission_amount", "commission_currency_rate")
+    def _compute_commission_amount_company(self):
+        # kurs baru ada setelah confirm, sebelum itu 0
+        for order in self:
+            order.commission_amount_company = order.commission_company_currency_id.round(
+                order.commission_amount * order.commission_currency_rate
+            )
+
+    @api.depends("commission_reversed_amount", "commission_currency_rate")
+    def _compute_commission_reversed_amount_company(self):
+        for order in self:
+            order.commission_reversed_amount_company = order.commission_company_currency_id.round(
+                order.commission_reversed_amount * order.commission_currency_rate
+            )
+
+    def _get_commission_currency_rates(self):
+        """Rate from the order currency to the company currency at the order date.
+
+        The rates of all the currencies of the batch are read once per
+        (company, date) and memoized, instead of one ``_convert`` per order.
+
+        :return: dict ``{order: rate}``
+        """
+        currencies = self.currency_id | self.company_id.currency_id
+        table = {}
+        rates = {}
+        for order in self:
+            company = order.company_id
+            day = order.date_order.date() if order.date_order else fields.Date.context_today(order)
+            if (company.id, day) not in table:
+                table[company.id, day] = currencies._get_rates(company, day)
+            currency_rates = table[company.id, day]
+            if order.currency_id == company.currency_id:
+                rates[order] = 1.0
+            else:
+                rates[order] = currency_rates[company.currency_id.id] / currency_rates[order.currency_id.id]
+        return rates
+
+    def _write_commission_currency_rate(self, vals=None):
+        # satu write per kurs, biasanya cuma beberapa
+        by_rate = {}
+        for order, rate in self._get_commission_currency_rates().items():
+            by_rate.setdefault(rate, []).append(order.id)
+        for rate, order_ids in by_rate.items():
+            self.browse(order_ids).write(dict(vals or {}, commission_currency_rate=rate))
+
+    def _get_commission_line_amounts(self):
+        """Split the order commission over its lines, pro rata of their base.
+
+        The rounding difference goes to the line with the biggest base, so
+        the lines always add up to the order. Same rule as
+        :meth:`_allocate_commission_lines_sql`.
+
+        :return: dict ``{line: amount}``, lines without share are left out
+        """
+        self.ensure_one()
+        lines = self.order_line.filtered(lambda l: not l.display_type)
+        if not lines or not self.commission_amount:
+            return {}
+        total, base = self.commission_amount, self.commission_base
+        amounts = {
+            line: self.currency_id.round(total * line.commission_base / base) if base else 0.0
+            for line in lines
+        }
+        anchor = max(lines, key=lambda l: abs(l.commission_base))
+        amounts[anchor] = self.currency_id.round(amounts[anchor] + total - sum(amounts.values()))
+        return amounts
+
+    @api.model
+    def _allocate_commission_lines_sql(self, order_ids):
+        """Set ``commission_amount`` of the lines of ``order_ids`` in one UPDATE.
+
+        SQL twin of :meth:`_get_commission_line_amounts`, for bulk paths.
+        The order ``commission_amount`` and ``commission_base`` must be
+        flushed already. Lines already holding their share are not rewritten.
+
+        :return: ids of the updated lines
+        """
+        self.env["sale.order.line"].flush_model(["order_id", "commission_base", "display_type", "sequence"])
+        self.env.cr.execute(SQL("""
+            WITH share AS (
+                SELECT sol.id, sol.order_id, so.commission_amount AS order_amount,
+                       CASE WHEN so.commission_base <> 0
+                            THEN ROUND(so.commission_amount * sol.commission_base / so.commission_base / cur.rounding) * cur.rounding
+                            ELSE 0
+                       END AS amount,
+                       ROW_NUMBER() OVER (PARTITION BY sol.order_id
+                                          ORDER BY ABS(sol.commission_base) DESC, sol.sequence, sol.id) AS rank
+                  FROM sale_order_line sol
+                  JOIN sale_order so ON so.id = sol.order_id
+                  JOIN res_currency cur ON cur.id = so.currency_id
+                 WHERE sol.order_id = ANY(%s)
+                   AND sol.display_type IS NULL
+            ), alloc AS (
+                SELECT id,
+                       amount + CASE WHEN rank = 1
+                                     THEN COALESCE(order_amount, 0) - SUM(amount) OVER (PARTITION BY order_id)
+                                     ELSE 0
+                                END AS amount
+                  FROM share
+            )
+            UPDATE sale_order_line sol
+               SET commission_amount = alloc.amount
+              FROM alloc
+             WHERE alloc.id = sol.id
+               AND sol.commission_amount IS DISTINCT FROM alloc.amount
+         RETURNING sol.id
+        """, list(order_ids)))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _get_commission_category_bases(self, ruled):
+        """Commission base per overridden product category of each order.
+
+        :return: dict ``{order: {categ_id: amount}}``
+        """
+        bases = {}
+        saved = {order: rule for order, rule in ruled.items() if order.id}
+        if saved:
+            self.env["sale.order.line"].flush_model(["order_id", "product_id", "commission_base"])
+            self.env["product.template"].flush_model(["categ_id"])
+            categ_ids = set().union(*(rule.categories for rule in saved.values()))
+            self.env.cr.execute(SQL("""
+                SELECT sol.order_id, pt.categ_id, SUM(sol.commission_base)
+                  FROM sale_order_line sol
+                  JOIN product_product pp ON pp.id = sol.product_id
+                  JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                 WHERE sol.order_id = ANY(%s) AND pt.categ_id = ANY(%s)
+              GROUP BY sol.order_id, pt.categ_id
+            """, [order.id for order in saved], list(categ_ids)))
+            orders = {order.id: order for order in saved}
+            for order_id, categ_id, amount in self.env.cr.fetchall():
+                order = orders[order_id]
+                if categ_id in saved[order].categories:
+                    bases.setdefault(order, {})[categ_id] = float(amount)
+
+        # order baru (onchange) belum ada di db
+        for order, rule in ruled.items():
+            if order.id:
+                continue
+            for line in order.order_line:
+                categ_id = line.product_id.categ_id.id
+                if categ_id in rule.categories:
+                    order_bases = bases.setdefault(order, {})
+                    order_bases[categ_id] = order_bases.get(categ_id, 0.0) + line.commission_base
+        return bases
+
+    @api.model
+    def _recompute_commission_amount_sql(self, domain=None, rate=None, chunk_size=5000, auto_commit=False):
+        """Recompute the stored ``commission_amount`` with one UPDATE per chunk.
+
+        Only orders that are not invoiced yet are touched. When ``rate`` is
+        given it also replaces ``commission_rate`` on those orders. Amounts
+        are rounded with the order currency like the ORM does, and the cache
+        of every chunk is invalidated so later reads see the new values.
+        The company currency amount uses the rate locked at confirm, and the
+        line amounts are reallocated by a second UPDATE. Orders under a
+        commission rule are recomputed by the ORM instead.
+
+        Rows whose values wouldn't change are not rewritten.
+
+        :return: number of updated orders
+        """
+        domain = expression.AND([
+            [
+                ("is_agent_sale", "=", True),
+                ("commission_invoice_id", "=", False),
+                ("commission_status", "in", ("draft", "confirmed")),
+            ],
+            domain or [],
+        ])
+        self.flush_model([
+            "commission_base", "commission_rate", "is_agent_sale", "commission_amount",
+            "commission_currency_rate", "commission_amount_company", "currency_id", "company_id",
+        ])
+        order_ids = self.search(domain, order="id").ids
+
+        Rule = self.env["reseller.commission.rule"]
+        Line = self.env["sale.order.line"]
+        new_rate = SQL("COALESCE(%s, so.commission_rate)", rate)
+        new_rate_auto = SQL("so.commission_rate_auto") if rate is None else SQL("FALSE")
+        new_amount = SQL("""
+            CASE
+                WHEN so.is_agent_sale AND %(new_rate)s > 0
+                THEN ROUND(so.commission_base * %(new_rate)s::numeric / 100 / cur.rounding) * cur.rounding
+                ELSE 0
+            END
+        """, new_rate=new_rate)
+        updated = 0
+        for chunk in split_every(chunk_size, order_ids, list):
+            # order yang pakai rule (tier / kategori) ga bisa pakai rumus flat,
+            # cuma di-compute ORM biar ga ditulis dua kali
+            ruled = self.browse(chunk).filtered(
+                lambda o: o.agent_id and Rule._get_rule(o.agent_id.id, o.principal_id.id)
+            )
+            ruled_ids = set(ruled.ids)
+            chunk = [order_id for order_id in chunk if order_id not in ruled_ids]
+            before = self._get_commission_snapshot(chunk)
+            self.env.cr.execute(SQL("""
+                UPDATE sale_order so
+                   SET commission_rate = %(new_rate)s,
+                       commission_rate_auto = %(new_rate_auto)s,
+                       commission_amount = %(new_amount)s,
+                       commission_amount_company = ROUND(
+                           %(new_amount)s * COALESCE(so.commission_currency_rate, 0)::numeric / ccur.rounding
+                       ) * ccur.rounding
+                  FROM res_currency cur, res_company comp, res_currency ccur
+                 WHERE cur.id = so.currency_id
+                   AND comp.id = so.company_id
+                   AND ccur.id = comp.currency_id
+                   AND so.id = ANY(%(ids)s)
+                   AND so.commission_invoice_id IS NULL
+                   -- baris yang nilainya sama ga ditulis ulang (ga bikin dead tuple)
+                   AND (so.commission_amount IS DISTINCT FROM %(new_amount)s
+                        OR so.commission_rate IS DISTINCT FROM %(new_rate)s
+                        OR so.commission_rate_auto IS DISTINCT FROM %(new_rate_auto)s)
+             RETURNING so.id
+            """, new_rate=new_rate, new_rate_auto=new_rate_auto, new_amount=new_amount, ids=chunk))
+            changed_ids = [row[0] for row in self.env.cr.fetchall()]
+            updated += len(changed_ids)
+            self._apply_commission_snapshot(before, self._get_commission_snapshot(chunk))
+            # line dialokasi ulang buat semua order di chunk: header sama tapi line-nya
+            # bisa aja udah melenceng, yang share-nya udah bener ga ditulis ulang
+            line_ids = self._allocate_commission_lines_sql(chunk)
+
+            orders = self.browse(changed_ids)
+            lines = Line.browse(line_ids)
+            orders.invalidate_recordset(["commission_rate", "commission_rate_auto", "commission_amount", "commission_amount_company"])
+            lines.invalidate_recordset(["commission_amount"])
+            # field lain yang depend ke komisi ikut di-recompute sama ORM,
+            # komisi order + line-nya udah bener dari UPDATE di atas
+            orders.modified(["commission_rate", "commission_amount", "commission_amount_company"])
+            lines.modified(["commission_amount"])
+            self.env.remove_to_compute(self._fields["commission_amount"], orders)
+            self.env.remove_to_compute(self._fields["commission_amount_company"], orders)
+            self.env.remove_to_compute(Line._fields["commission_amount"], lines)
+            if ruled:
+                amounts = {order.id: order.commission_amount for order in ruled}
+                if rate is not None:
+                    ruled.write({"commission_rate": rate, "commission_rate_auto": False})
+                self.env.add_to_compute(self._fields["commission_amount"], ruled)
+                self.env.add_to_compute(self._fields["commission_amount_company"], ruled)
+                self.env.add_to_compute(Line._fields["commission_amount"], ruled.order_line)
+                ruled.flush_recordset(["commission_amount", "commission_amount_company"])
+                ruled.order_line.flush_recordset(["commission_amount"])
+                updated += sum(1 for order in ruled if order.commission_amount != amounts[order.id])
+            if auto_commit:
+                self.env.flush_all()
+                self.env.cr.commit()
+            _logger.info(f"Recompute komisi: {updated}/{len(order_ids)} order")
+
+        return updated
+
+    @api.model
+    def _cron_recompute_commission_amount(self):
+        self._recompute_commission_amount_sql(auto_commit=True)
+
+    @api.model
+    def _get_commission_rate_error(self, rate):
+        # dipakai constraint + loader (cek set-wise sebelum create), return pesan error atau False
+        if rate < 0:
+            return _("Commission rate tidak boleh negatif")
+        if rate > 100:
+            return _("Commission rate max 100%")
+        return False
 
     @api.constrains("commission_rate")
     def _check_commission_rate_value(self):
         for order in self:
-            if order.commission_rate < 0:
-                raise ValidationError(_("Commission rate tidak boleh negatif"))
-            if order.commission_rate > 100:
-                raise ValidationError(_("Commission rate max 100%"))
+            error = self._get_commission_rate_error(order.commission_rate)
+            if error:
+                raise ValidationError(error)
+
+    def _get_commission_confirm_error(self):
+        # validasi agent sale sebelum confirm, return pesan error atau False
+        self.ensure_one()
+        if not self.is_agent_sale:
+            return False
+        if not self.agent_id:
+            return _("Agent harus dipilih")
+        if not self.principal_id:
+            return _("Principal harus dipilih")
+        # agent yang punya rule ga pakai rate flat, rate-nya boleh 0
+        rule = self.env["reseller.commission.rule"]._get_rule(self.agent_id.id, self.principal_id.id)
+        if not rule and self.commission_rate <= 0:
+            return _("Commission rate harus lebih dari 0")
+        return False
 
+    @instrument("action_confirm")
     def action_confirm(self):
+        # rate otomatis pakai rate yang berlaku di tanggal confirm
+        # (order import: tanggal order dari sistem upstream)
+        self._refresh_auto_commission_rate(
+            None if self.env.context.get("commission_import") else fields.Datetime.now()
+        )
+
         # validasi dulu sebelum confirm
         for order in self:
-            if order.is_agent_sale:
-                if not order.agent_id:
-                    raise UserError(_("Agent harus dipilih"))
-                if not order.principal_id:
-                    raise UserError(_("Principal harus dipilih"))
-                if order.commission_rate <= 0:
-                    raise UserError(_("Commission rate harus lebih dari 0"))
+            error = order._get_commission_confirm_error()
+            if error:
+                raise UserError(error)
 
         res = super().action_confirm()
 
-        # update status ke confirmed
-        for order in self:
-            if order.is_agent_sale:
-                order.commission_status = "confirmed"
-                _logger.info(f"Commission confirmed: {order.name} - {order.commission_amount}")
+        # update status ke confirmed + kunci kurs currency company, satu write per kurs
+        agent_orders = self.filtered("is_agent_sale")
+        if agent_orders:
+            agent_orders._write_commission_currency_rate({"commission_status": "confirmed"})
+            _logger.info(f"Commission confirmed: {len(agent_orders)} order, total: {sum(agent_orders.mapped('commission_amount'))}")
 
         return res
 
-    def action_create_commission_invoice(self):
+    def _prepare_confirmation_values(self):
+        vals = super()._prepare_confirmation_values()
+        # order import tetep pakai tanggal order dari sistem upstream
+        if self.env.context.get("commission_import"):
+            vals.pop("date_order", None)
+        return vals
+
+    def _get_commission_invoice_error(self):
+        # cek dulu semua requirement, return pesan error atau False
         self.ensure_one()
-        
-        # cek dulu semua requirement
         if not self.is_agent_sale:
-            raise UserError(_("Ini bukan agent sale"))
+            return _("Ini bukan agent sale")
         if self.state != "sale":
-            raise UserError(_("SO harus di-confirm dulu"))
+            return _("SO harus di-confirm dulu")
         if self.commission_status != "confirmed":
-            raise UserError(_("Status commission belum confirmed"))
+            return _("Status commission belum confirmed")
         if self.commission_invoice_id:
-            raise UserError(_("Invoice sudah pernah dibuat"))
+            return _("Invoice sudah pernah dibuat")
         if not self.agent_id or not self.principal_id:
-            raise UserError(_("Agent dan Principal harus diisi"))
+            return _("Agent dan Principal harus diisi")
         if self.commission_amount <= 0:
-            raise UserError(_("Commission amount harus > 0"))
-        
-        # bikin invoice dari agent ke principal
-        # sesuai PSAK 72, agent cuma catat komisi aja
-        inv_line = {
+            return _("Commission amount harus > 0")
+        return False
+
+    def _prepare_commission_invoice_line_vals(self, account):
+        self.ensure_one()
+        return {
             "name": f"Komisi - {self.name} ({self.partner_id.name})",
             "quantity": 1.0,
             "price_unit": self.commission_amount,
-            "account_id": self._get_revenue_account().id,
+            "account_id": account.id,
         }
-        
-        invoice = self.env["account.move"].create({
+
+    def _prepare_commission_invoice_vals(self, account):
+        # bikin invoice dari agent ke principal
+        # sesuai PSAK 72, agent cuma catat komisi aja
+        self.ensure_one()
+        return {
             "move_type": "out_invoice",
             "partner_id": self.principal_id.id,
+            "currency_id": self.currency_id.id,
             "invoice_origin": self.name,
             "invoice_date": fields.Date.today(),
-            "invoice_line_ids": [(0, 0, inv_line)],
-        })
-        
-        invoice.action_post()
-        
-        self.commission_invoice_id = invoice.id
-        self.commission_status = "invoiced"
-        
-        _logger.info(f"Invoice komisi created: {invoice.name} - Amount: {self.commission_amount}")
-        
+            "invoice_line_ids": [(0, 0, self._prepare_commission_invoice_line_vals(account))],
+        }
+
+    def _lock_commission_orders(self, nowait=False):
+        """Row-lock the orders before touching their commission invoice.
+
+        Orders locked by another transaction are left out (``SKIP LOCKED``),
+        or make the call fail right away with ``nowait``, so concurrent
+        invoicing never waits and never issues a second invoice. The lock is
+        ``FOR NO KEY UPDATE``, rows referencing the orders (like the reversal
+        queue) can still be inserted meanwhile.
+
+        :return: the orders locked by this transaction
+        """
+        if not self:
+            return self
+        self.flush_recordset(["commission_status", "commission_invoice_id", "commission_reversed_amount"])
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(SQL(
+                    "SELECT id FROM sale_order WHERE id = ANY(%s) FOR NO KEY UPDATE %s",
+                    self.ids, SQL("NOWAIT") if nowait else SQL("SKIP LOCKED"),
+                ))
+                locked = self.browse([row[0] for row in self.env.cr.fetchall()])
+        except LockNotAvailable:
+            raise UserError(_("Invoice komisi lagi diproses user lain, coba lagi nanti"))
+        # baca ulang setelah lock, bisa aja udah diubah transaksi lain
+        locked.invalidate_recordset(["commission_status", "commission_invoice_id", "commission_reversed_amount"])
+        return locked
+
+    @instrument("create_commission_invoices")
+    def _create_commission_invoices(self, nowait=False):
+        """Create and post commission invoices for all valid orders in self.
+
+        Orders are locked and validated in one pass, invoices are created
+        with one ``create()`` per company and posted together. When posting
+        fails, each invoice is posted under its own savepoint and only the
+        orders whose invoice can't be posted are skipped.
+
+        :param nowait: fail instead of skipping orders locked elsewhere
+        :return: tuple ``(invoices, skipped)`` where ``skipped`` maps each
+            rejected order to the reason it was skipped
+        """
+        locked = self._lock_commission_orders(nowait=nowait)
+        skipped = dict.fromkeys(self - locked, _("Invoice komisi lagi diproses user lain"))
+        todo_ids = []
+        for order in locked:
+            error = order._get_commission_invoice_error()
+            if error:
+                skipped[order] = error
+            else:
+                todo_ids.append(order.id)
+
+        invoices = self.env["account.move"]
+        todo = self.browse(todo_ids)
+        for company in todo.company_id:
+            orders = todo.filtered(lambda o: o.company_id == company)
+            account = orders._get_revenue_account()
+            moves = self.env["account.move"].with_company(company).create(
+                [order._prepare_commission_invoice_vals(account) for order in orders]
+            )
+            for order, move in zip(orders, moves):
+                order.commission_invoice_id = move.id
+            invoices |= moves
+
+        if invoices:
+            failed = todo._post_commission_invoices()
+            skipped.update(failed)
+            todo -= self.browse([order.id for order in failed])
+            invoices = todo.commission_invoice_id
+            todo.commission_status = "invoiced"
+            _logger.info(f"Invoice komisi created: {len(invoices)} invoice, total: {sum(todo.mapped('commission_amount'))}")
+        return invoices, skipped
+
+    def _post_commission_invoices(self):
+        """Post the commission invoices of these orders.
+
+        :return: dict ``{order: error}`` of the orders whose invoice failed,
+            their draft invoice is deleted and the error kept on the order
+        """
+        try:
+            with self.env.cr.savepoint():
+                self.commission_invoice_id.action_post()
+            return {}
+        except Exception:
+            # satu invoice gagal jangan bikin semua gagal, ulang per invoice
+            _logger.exception("Post invoice komisi gagal sekaligus, diulang per invoice")
+
+        failed = {}
+        for order in self:
+            try:
+                with self.env.cr.savepoint():
+                    order.commission_invoice_id.action_post()
+            except Exception as e:
+                failed[order] = str(e)
+        if failed:
+            orders = self.browse([order.id for order in failed])
+            moves = orders.commission_invoice_id
+            orders.commission_invoice_id = False
+            moves.unlink()
+            for order, error in failed.items():
+                order.commission_invoice_error = error
+        return failed
+
+    @instrument("action_create_commission_invoice")
+    def action_create_commission_invoice(self):
+        self.ensure_one()
+
+        error = self._get_commission_invoice_error()
+        if error:
+            raise UserError(error)
+
+        invoices, skipped = self._create_commission_invoices(nowait=True)
+        if skipped:
+            raise UserError(skipped[self])
+
         return {
             "type": "ir.actions.act_window",
             "res_model": "account.move",
             "view_mode": "form",
-            "res_id": invoice.id,
+            "res_id": invoices.id,
             "target": "current",
         }
 
-    def _get_revenue_account(self):
-        # cari revenue account buat invoice line
-        acc = self.env["account.account"].search(
-            [("code", "=like", "41%"), ("deprecated", "=", False)],
-            limit=1
+    def action_create_commission_invoice_batch(self):
+        # versi multi record, dipanggil dari server action / cron
+        invoices, skipped = self._create_commission_invoices()
+        for order, reason in skipped.items():
+            _logger.info(f"Invoice komisi skipped: {order.name} - {reason}")
+
+        message = _("%(count)s invoice komisi dibuat.", count=len(invoices))
+        if skipped:
+            message += "\n" + "\n".join(
+                f"{order.name}: {reason}" for order, reason in skipped.items()
+            )
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Commission Invoice"),
+                "message": message,
+                "type": "warning" if skipped else "success",
+                "sticky": bool(skipped),
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
+
+    def action_queue_commission_invoice(self):
+        # cuma ditandain, invoice-nya dibikin sama cron biar ga kena timeout
+        orders = self.filtered("is_agent_sale")
+        orders.write({
+            "commission_invoice_queued": True,
+            "commission_invoice_error": False,
+        })
+        self.env.ref("reseller_commission.ir_cron_commission_invoice_queue")._trigger()
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Commission Invoice"),
+                "message": _("%(count)s order masuk antrian invoice komisi.", count=len(orders)),
+                "type": "info",
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
+
+    @api.model
+    def _process_commission_invoice_queue(self, chunk_size=200, auto_commit=True):
+        """Drain the commission invoice queue chunk by chunk.
+
+        Each chunk is claimed with ``FOR NO KEY UPDATE SKIP LOCKED`` so concurrent
+        workers never pick the same orders, and is committed on its own.
+        Orders stay queued until their chunk commits, so an interrupted run
+        resumes where it stopped.
+
+        :return: number of processed orders
+        """
+        processed = 0
+        while True:
+            # flag antrian / dequeue yang masih pending di ORM harus kelihatan sama SELECT
+            self.flush_model(["commission_invoice_queued", "commission_invoice_error"])
+            self.env.cr.execute(SQL("""
+                SELECT id FROM sale_order
+                 WHERE commission_invoice_queued
+                 ORDER BY id
+                 LIMIT %s
+                   FOR NO KEY UPDATE SKIP LOCKED
+            """, chunk_size))
+            order_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not order_ids:
+                break
+
+            self.browse(order_ids)._process_commission_invoice_chunk()
+            processed += len(order_ids)
+            if auto_commit:
+                self.env.cr.commit()
+            _logger.info(f"Antrian invoice komisi: {processed} order diproses")
+        return processed
+
+    def _process_commission_invoice_chunk(self):
+        try:
+            with self.env.cr.savepoint():
+                _invoices, skipped = self._create_commission_invoices()
+        except Exception:
+            # satu order gagal jangan bikin satu chunk gagal, ulang per order
+            _logger.exception("Invoice komisi gagal per chunk, diulang per order")
+            skipped = {}
+            for order in self:
+                try:
+                    with self.env.cr.savepoint():
+                        skipped.update(order._create_commission_invoices()[1])
+                except Exception as e:
+                    skipped[order] = str(e)
+
+        errors = {}
+        for order, reason in skipped.items():
+            errors.setdefault(reason, []).append(order.id)
+        failed_ids = [order.id for order in skipped]
+
+        (self - self.browse(failed_ids)).write({
+            "commission_invoice_queued": False,
+            "commission_invoice_error": False,
+        })
+        for reason, order_ids in errors.items():
+            self.browse(order_ids).write({
+                "commission_invoice_queued": False,
+                "commission_invoice_error": reason,
+            })
+
+    @api.model
+    def _sync_commission_paid_status(self):
+        """Sync ``commission_status`` with the payment state of the invoices.
+
+        Only invoices written since the last run are looked at: the scan
+        starts from those moves and joins their orders, and all transitions
+        are done with one UPDATE. The watermark (``ir.config_parameter``) is
+        the latest ``write_date`` seen, and every run scans again an overlap
+        window before it: ``write_date`` is the start of the writing
+        transaction, a long one commits with a date older than the latest
+        one seen. Orders already in the right status are skipped, so the
+        overlap doesn't write anything twice. Invoices whose payment gets undone go back to
+        "invoiced".
+
+        :return: the orders whose status changed
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        watermark = ICP.get_param("reseller_commission.paid_sync_watermark", "1970-01-01 00:00:00")
+        overlap = int(ICP.get_param("reseller_commission.paid_sync_overlap_minutes", 60))
+        self.env["account.move"].flush_model(["payment_state"])
+        self.flush_model(["commission_status", "commission_invoice_id", "commission_paid_date"])
+
+        # watermark = write_date terbaru yang udah kelihatan (udah commit),
+        # bukan jam sekarang
+        scan_from = SQL("%s::timestamp - %s * interval '1 minute'", watermark, overlap)
+        self.env.cr.execute(SQL("""
+            SELECT MAX(write_date) FROM account_move
+             WHERE move_type = 'out_invoice' AND write_date >= %s
+        """, scan_from))
+        next_watermark = self.env.cr.fetchone()[0]
+
+        # order kandidat dulu, buat delta summary + ledger komisi.
+        # mulai dari invoice yang berubah (index write_date), baru join ke order;
+        # yang status-nya udah bener ga ikut (window overlap dibaca ulang tiap run)
+        self.env.cr.execute(SQL("""
+            SELECT so.id
+              FROM account_move am
+              JOIN sale_order so ON so.commission_invoice_id = am.id
+             WHERE am.move_type = 'out_invoice'
+               AND am.write_date >= %s
+               AND so.commission_status IN ('invoiced', 'paid')
+               AND so.commission_status != CASE WHEN am.payment_state IN ('paid', 'in_payment')
+                                                THEN 'paid' ELSE 'invoiced' END
+        """, scan_from))
+        candidate_ids = [row[0] for row in self.env.cr.fetchall()]
+        before = self._get_commission_snapshot(candidate_ids)
+
+        self.env.cr.execute(SQL("""
+            UPDATE sale_order so
+               SET commission_status = new.status,
+                   commission_paid_date = CASE WHEN new.status = 'paid'
+                                               THEN COALESCE(so.commission_paid_date, am.write_date::date)
+                                          END
+              FROM account_move am,
+                   LATERAL (SELECT CASE WHEN am.payment_state IN ('paid', 'in_payment')
+                                        THEN 'paid' ELSE 'invoiced' END AS status) new
+             WHERE am.id = so.commission_invoice_id
+               AND so.id = ANY(%s)
+               AND so.commission_status != new.status
+         RETURNING so.id
+        """, candidate_ids))
+        orders = self.browse([row[0] for row in self.env.cr.fetchall()])
+        self._apply_commission_snapshot(before, self._get_commission_snapshot(candidate_ids))
+
+        orders.invalidate_recordset(["commission_status", "commission_paid_date"])
+        orders.modified(["commission_status", "commission_paid_date"])
+        if next_watermark and fields.Datetime.to_string(next_watermark) > watermark:
+            ICP.set_param("reseller_commission.paid_sync_watermark", fields.Datetime.to_string(next_watermark))
+        if orders:
+            _logger.info(f"Status komisi paid di-sync: {len(orders)} order")
+        return orders
+
+    @api.model
+    def _get_commission_settlement_domain(self):
+        # order yang siap di-settle: confirmed, belum ada invoice komisi
+        return [
+            ("is_agent_sale", "=", True),
+            ("state", "=", "sale"),
+            ("commission_status", "=", "confirmed"),
+            ("commission_invoice_id", "=", False),
+            ("agent_id", "!=", False),
+            ("principal_id", "!=", False),
+            ("commission_amount", ">", 0),
+        ]
+
+    @api.model
+    def _create_commission_settlements(self, domain=None, summarize=False):
+        """Issue one commission invoice per (principal, currency, company, month).
+
+        Orders are grouped in SQL through ``_read_group``; each group becomes
+        one move with one line per order, or a single summary line when
+        ``summarize`` is set. Every settled order is linked to its move.
+
+        :return: the posted settlement invoices
+        """
+        domain = expression.AND([self._get_commission_settlement_domain(), domain or []])
+        # order yang lagi di-invoice di transaksi lain di-skip
+        locked = self.search(domain)._lock_commission_orders()
+        groups = self._read_group(
+            expression.AND([domain, [("id", "in", locked.ids)]]),
+            ["company_id", "principal_id", "currency_id", "date_order:month"],
+            ["id:array_agg", "commission_amount:sum"],
         )
+
+        invoices = self.env["account.move"]
+        for company in {group[0] for group in groups}:
+            account = self.with_company(company)._get_revenue_account()
+            vals_list = []
+            orders_list = []
+            for _company, principal, currency, period, order_ids, amount in groups:
+                if _company != company:
+                    continue
+                orders = self.browse(order_ids)
+                if summarize:
+                    lines = [(0, 0, {
+                        "name": _(
+                            "Komisi %(principal)s periode %(period)s (%(count)s SO)",
+                            principal=principal.name, period=period.strftime("%m/%Y"), count=len(orders),
+                        ),
+                        "quantity": 1.0,
+                        "price_unit": amount,
+                        "account_id": account.id,
+                    })]
+                else:
+                    lines = [(0, 0, order._prepare_commission_invoice_line_vals(account)) for order in orders]
+                vals_list.append({
+                    "move_type": "out_invoice",
+                    "partner_id": principal.id,
+                    "currency_id": currency.id,
+                    "invoice_origin": _("Settlement komisi %s", period.strftime("%m/%Y")),
+                    "invoice_date": fields.Date.today(),
+                    "invoice_line_ids": lines,
+                })
+                orders_list.append(orders)
+
+            moves = self.env["account.move"].with_company(company).create(vals_list)
+            for orders, move in zip(orders_list, moves):
+                orders.write({
+                    "commission_invoice_id": move.id,
+                    "commission_status": "invoiced",
+                })
+            invoices |= moves
+
+        if invoices:
+            invoices.action_post()
+            _logger.info(f"Settlement komisi: {len(invoices)} invoice dari {len(groups)} group")
+        return invoices
+
+    def _action_cancel(self):
+        # komisi yang udah di-invoice di-reverse full sisanya sebelum SO di-cancel
+        billed = self.filtered(lambda o: o.is_agent_sale and o.commission_status in ("invoiced", "paid"))
+        if billed:
+            _credit_notes, skipped = billed._create_commission_reversals(reason=_("SO di-cancel"), nowait=True)
+            for order, reason in skipped.items():
+                _logger.warning(f"Reversal komisi skipped: {order.name} - {reason}")
+        return super()._action_cancel()
+
+    def _get_commission_reversal_error(self, amount):
+        # cek dulu bisa di-reverse atau ga, return pesan error atau False
+        self.ensure_one()
+        if not self.is_agent_sale:
+            return _("Ini bukan agent sale")
+        if self.commission_status not in ("invoiced", "paid") or not self.commission_invoice_id:
+            return _("Komisi belum di-invoice")
+        if self.commission_invoice_id.state != "posted":
+            return _("Invoice komisi belum di-post")
+        if self.currency_id.compare_amounts(amount, 0.0) <= 0:
+            return _("Ga ada sisa komisi yang bisa di-reverse")
+        return False
+
+    @api.model
+    def _prepare_commission_reversal_vals(self, move, order_amounts, reason=None):
+        # credit note cuma buat bagian order yang di-reverse (invoice settlement bisa isi banyak SO),
+        # account + pajak ngikut line invoice komisi asal
+        line = move.invoice_line_ids[:1]
+        today = fields.Date.today()
+        return {
+            "ref": reason or _("Reversal komisi %s", move.name),
+            "date": today,
+            "invoice_date": today,
+            "invoice_origin": ", ".join(order.name for order, _amount in order_amounts),
+            "line_ids": [Command.create({
+                "display_type": "product",
+                "name": _("Reversal komisi - %s", order.name),
+                "quantity": 1.0,
+                "price_unit": amount,
+                "account_id": line.account_id.id,
+                "tax_ids": [Command.set(line.tax_ids.ids)],
+            }) for order, amount in order_amounts],
+        }
+
+    @instrument("create_commission_reversals")
+    def _create_commission_reversals(self, amounts=None, reason=None, nowait=False, queue=False, batch_size=200):
+        """Reverse the commission invoiced on the orders with credit notes.
+
+        The commission invoices are reversed with one ``_reverse_moves``
+        call per batch, each credit note holding one line per order for the
+        reversed amount. Orders whose whole commission got reversed move to
+        "reversed".
+
+        :param amounts: dict ``{order_id: amount}`` in order currency, by
+            default the whole commission not reversed yet
+        :param reason: reference of the credit notes
+        :param nowait: fail instead of skipping orders locked elsewhere
+        :param queue: put orders locked elsewhere in the reversal queue
+            instead of skipping them
+        :return: tuple ``(credit_notes, skipped)`` where ``skipped`` maps each
+            rejected order to the reason it was skipped
+        """
+        locked = self._lock_commission_orders(nowait=nowait)
+        busy = self - locked
+        if queue:
+            self.env["reseller.commission.reversal.queue"]._enqueue({
+                order.id: amounts[order.id] if amounts is not None else order.commission_amount - order.commission_reversed_amount
+                for order in busy
+            }, reason)
+            busy = self.browse()
+        skipped = dict.fromkeys(busy, _("Invoice komisi lagi diproses user lain"))
+        by_move = {}
+        for order in locked:
+            remaining = order.commission_amount - order.commission_reversed_amount
+            amount = order.currency_id.round(
+                min(amounts.get(order.id, 0.0), remaining) if amounts is not None else remaining
+            )
+            error = order._get_commission_reversal_error(amount)
+            if error:
+                skipped[order] = error
+            else:
+                by_move.setdefault(order.commission_invoice_id, []).append((order, amount))
+
+        credit_notes = self.env["account.move"]
+        for move_ids in split_every(batch_size, [move.id for move in by_move]):
+            moves = self.env["account.move"].browse(move_ids)
+            reversals = moves._reverse_moves([
+                self._prepare_commission_reversal_vals(move, by_move[move], reason) for move in moves
+            ])
+            reversals.action_post()
+            for move, reversal in zip(moves, reversals):
+                for order, amount in by_move[move]:
+                    reversed_amount = order.commission_reversed_amount + amount
+                    vals = {
+                        "commission_reversed_amount": reversed_amount,
+                        "commission_reversal_ids": [Command.link(reversal.id)],
+                    }
+                    if order.currency_id.compare_amounts(reversed_amount, order.commission_amount) >= 0:
+                        vals["commission_status"] = "reversed"
+                    order.write(vals)
+            credit_notes |= reversals
+
+        if credit_notes:
+            _logger.info(f"Reversal komisi: {len(credit_notes)} credit note dari {sum(len(v) for v in by_move.values())} order")
+        return credit_notes, skipped
+
+    @api.model
+    def _parse_agent_sale_import(self, data, file_format):
+        """Turn a CSV / JSON batch into the order dicts of ``load_agent_sales``.
+
+        CSV has one row per order line (``ref, date_order, customer, agent,
+        principal, commission_rate, product, quantity, price_unit``), rows
+        with the same ``ref`` make one order. JSON is a list of orders, or
+        ``{"orders": [...]}``.
+        """
+        if isinstance(data, bytes):
+            data = data.decode("utf-8-sig")
+        if file_format == "json":
+            rows = json.loads(data)
+            return rows.get("orders", []) if isinstance(rows, dict) else rows
+
+        orders = {}
+        for row in csv.DictReader(io.StringIO(data)):
+            ref = (row.get("ref") or "").strip()
+            order = orders.setdefault(ref, {
+                "ref": ref,
+                "date_order": row.get("date_order"),
+                "customer": row.get("customer"),
+                "agent": row.get("agent"),
+                "principal": row.get("principal"),
+                "commission_rate": row.get("commission_rate"),
+                "lines": [],
+            })
+            order["lines"].append({
+                "product": row.get("product"),
+                "quantity": row.get("quantity") or 1.0,
+                "price_unit": row.get("price_unit"),
+            })
+        return list(orders.values())
+
+    @api.model
+    def _get_agent_sale_import_refs(self, orders):
+        # semua referensi partner / produk / order lama dicari sekali per batch
+        partner_refs, product_codes, order_refs = set(), set(), set()
+        for row in orders:
+            if not isinstance(row, dict):
+                continue
+            partner_refs.update(str(row[key]) for key in ("customer", "agent", "principal") if row.get(key))
+            lines = row.get("lines")
+            product_codes.update(
+                str(line["product"]) for line in (lines if isinstance(lines, list) else [])
+                if isinstance(line, dict) and line.get("product")
+            )
+            if row.get("ref"):
+                order_refs.add(str(row["ref"]))
+
+        partners = {}
+        for partner in self.env["res.partner"].search_fetch(
+            [("ref", "in", list(partner_refs))], ["ref", "is_agent", "is_principal"],
+        ):
+            partners.setdefault(partner.ref, partner)
+        products = {}
+        for product in self.env["product.product"].search_fetch(
+            [("default_code", "in", list(product_codes))], ["default_code"],
+        ):
+            products.setdefault(product.default_code, product)
+        existing = set(self.search_fetch(
+            [("is_agent_sale", "=", True), ("client_order_ref", "in", list(order_refs))], ["client_order_ref"],
+        ).mapped("client_order_ref"))
+        return partners, products, existing
+
+    @api.model
+    def _prepare_agent_sale_import_vals(self, row, partners, products, existing):
+        # validasi satu baris import pakai data yang udah di-lookup, error -> UserError
+        if not isinstance(row, dict):
+            raise UserError(_("Format order salah"))
+        ref = str(row.get("ref") or "").strip()
+        if not ref:
+            raise UserError(_("Ref order kosong"))
+        if ref in existing:
+            raise UserError(_("Order %s udah pernah di-import", ref))
+
+        def partner(key, flag=None):
+            value = partners.get(str(row.get(key) or ""))
+            if not value or (flag and not value[flag]):
+                raise UserError(_("%(role)s %(ref)s ga ketemu", role=key.capitalize(), ref=row.get(key)))
+            return value
+
+        lines = row.get("lines")
+        if not isinstance(lines, list) or not lines:
+            raise UserError(_("Order ga ada line"))
+        order_lines = []
+        for line in lines:
+            product = products.get(str(line.get("product") or "")) if isinstance(line, dict) else None
+            if not product:
+                raise UserError(_("Produk %s ga ketemu", line.get("product") if isinstance(line, dict) else line))
+            line_vals = {"product_id": product.id, "product_uom_qty": float(line.get("quantity") or 1.0)}
+            if line.get("price_unit") not in (None, ""):
+                line_vals["price_unit"] = float(line["price_unit"])
+            order_lines.append(Command.create(line_vals))
+
+        vals = {
+            "partner_id": partner("customer").id,
+            "is_agent_sale": True,
+            "agent_id": partner("agent", "is_agent").id,
+            "principal_id": partner("principal", "is_principal").id,
+            "client_order_ref": ref,
+            "order_line": order_lines,
+        }
+        if row.get("date_order"):
+            vals["date_order"] = fields.Datetime.to_datetime(row["date_order"])
+        if row.get("commission_rate") not in (None, ""):
+            vals["commission_rate"] = float(row["commission_rate"])
+            error = self._get_commission_rate_error(vals["commission_rate"])
+            if error:
+                raise UserError(error)
+        return vals
+
+    @api.model
+    def _load_agent_sale_chunk(self, chunk, confirm):
+        """Create (and confirm) one chunk of imported orders.
+
+        The chunk is created with one ``create()`` and confirmed with one
+        ``action_confirm()``; if that fails it's retried order by order so
+        one bad row doesn't take the chunk down. Orders that can't be
+        confirmed are deleted again.
+
+        :param chunk: list of ``(row index, ref, vals)``
+        :return: tuple ``(orders, errors)`` with ``errors`` as ``{row index: message}``
+        """
+        errors = {}
+        try:
+            with self.env.cr.savepoint():
+                orders = self.create([vals for _index, _ref, vals in chunk])
+            created = list(zip(chunk, orders))
+        except Exception:
+            _logger.exception("Import agent sale gagal per chunk, diulang per order")
+            created = []
+            for item in chunk:
+                try:
+                    with self.env.cr.savepoint():
+                        created.append((item, self.create([item[2]])))
+                except Exception as e:
+                    errors[item[0]] = str(e)
+        if not confirm:
+            return self.browse([order.id for _item, order in created]), errors
+
+        valid = []
+        invalid = self.browse()
+        for item, order in created:
+            error = order._get_commission_confirm_error()
+            if error:
+                errors[item[0]] = error
+                invalid |= order
+            else:
+                valid.append((item, order))
+        orders = self.browse([order.id for _item, order in valid])
+        try:
+            with self.env.cr.savepoint():
+                orders.action_confirm()
+        except Exception:
+            _logger.exception("Confirm agent sale import gagal per chunk, diulang per order")
+            for item, order in valid:
+                try:
+                    with self.env.cr.savepoint():
+                        order.action_confirm()
+                except Exception as e:
+                    errors[item[0]] = str(e)
+                    invalid |= order
+            orders -= invalid
+        invalid.unlink()
+        return orders, errors
+
+    @api.model
+    @instrument("load_agent_sales")
+    def load_agent_sales(self, data, file_format="json", confirm=False, chunk_size=1000):
+        """Bulk load agent sales pushed by an upstream system.
+
+        ``data`` is a list of orders ``{ref, date_order, customer, agent,
+        principal, commission_rate, lines: [{product, quantity, price_unit}]}``
+        or the same batch as CSV / JSON text. Partners are referenced by
+        ``ref``, products by ``default_code``, orders by ``client_order_ref``
+        (an order already loaded is rejected, so a batch can be resent).
+
+        All references are resolved with one lookup per batch, rows are
+        validated before ``create()`` so the constraints never abort a
+        chunk, and each chunk is created and confirmed set-wise.
+
+        :param confirm: confirm the orders, keeping their ``date_order``
+        :return: dict ``{"created": [order ids], "errors": [{"row", "ref", "error"}]}``
+            with ``row`` the 0-based position of the order in the batch
+        """
+        if isinstance(data, (str, bytes)):
+            data = self._parse_agent_sale_import(data, file_format)
+        loader = self.with_context(commission_import=True, tracking_disable=True, mail_create_nolog=True)
+        partners, products, existing = loader._get_agent_sale_import_refs(data)
+
+        todo = []
+        errors = {}
+        for index, row in enumerate(data):
+            try:
+                vals = loader._prepare_agent_sale_import_vals(row, partners, products, existing)
+            except (UserError, ValueError, TypeError, AttributeError) as e:
+                errors[index] = e.args[0] if isinstance(e, UserError) else _("Data order salah: %s", e)
+                continue
+            existing.add(vals["client_order_ref"])
+            todo.append((index, vals["client_order_ref"], vals))
+
+        created = []
+        for chunk in split_every(chunk_size, todo, list):
+            orders, chunk_errors = loader._load_agent_sale_chunk(chunk, confirm)
+            created += orders.ids
+            errors.update(chunk_errors)
+            _logger.info(f"Import agent sale: {len(created)}/{len(todo)} order, {len(errors)} error")
+
+        def row_ref(index):
+            row = data[index]
+            return row.get("ref") if isinstance(row, dict) else False
+
+        return {
+            "created": created,
+            "errors": [
+                {"row": index, "ref": row_ref(index), "error": error}
+                for index, error in sorted(errors.items())
+            ],
+        }
+
+    @api.model
+    def _get_commission_statement_header(self):
+        return [
+            _("Order"), _("Tanggal"), _("Customer"), _("Agent"), _("Principal"), _("Currency"),
+            _("Untaxed"), _("Dasar Komisi"), _("Rate (%)"), _("Komisi"), _("Status Komisi"), _("Invoice Komisi"),
+        ]
+
+    @api.model
+    def _iter_commission_statement_rows(self, role, partner_id, date_from, date_to, batch_size=2000):
+        """Yield the confirmed agent sales of one agent or principal, by batch.
+
+        Keyset pagination on ``(date_order, id)``: every batch is a range
+        scan on the partial ``is_agent_sale`` index and no record goes
+        through the ORM cache, so memory doesn't grow with the period.
+
+        :param role: ``"agent"`` or ``"principal"``
+        :param date_to: last day included
+        :return: generator of lists of row tuples, see
+            :meth:`_get_commission_statement_header`
+        """
+        column = SQL.identifier("so", "agent_id" if role == "agent" else "principal_id")
+        statuses = dict(self._fields["commission_status"]._description_selection(self.env))
+        date_to = fields.Date.to_date(date_to) + timedelta(days=1)
+        after = SQL()
+        while True:
+            self.env.cr.execute(SQL("""
+                SELECT so.id, so.name, so.date_order, cust.complete_name, agent.complete_name,
+                       principal.complete_name, cur.name, so.amount_untaxed, so.commission_base,
+                       so.commission_rate, so.commission_amount, so.commission_status, am.name
+                  FROM sale_order so
+                  JOIN res_partner cust ON cust.id = so.partner_id
+                  JOIN res_currency cur ON cur.id = so.currency_id
+             LEFT JOIN res_partner agent ON agent.id = so.agent_id
+             LEFT JOIN res_partner principal ON principal.id = so.principal_id
+             LEFT JOIN account_move am ON am.id = so.commission_invoice_id
+                 WHERE so.is_agent_sale
+                   AND %(column)s = %(partner_id)s
+                   AND so.state = 'sale'
+                   AND so.company_id = ANY(%(company_ids)s)
+                   AND so.date_order >= %(date_from)s
+                   AND so.date_order < %(date_to)s
+                   %(after)s
+              ORDER BY so.date_order, so.id
+                 LIMIT %(limit)s
+            """, column=column, partner_id=partner_id, company_ids=self.env.companies.ids,
+                date_from=date_from, date_to=date_to, after=after, limit=batch_size))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                return
+            yield [
+                (name, date_order, customer, agent, principal, currency, float(untaxed or 0.0),
+                 float(base or 0.0), rate or 0.0, float(amount or 0.0), statuses.get(status, status), invoice or "")
+                for (_id, name, date_order, customer, agent, principal, currency,
+                     untaxed, base, rate, amount, status, invoice) in rows
+            ]
+            if len(rows) < batch_size:
+                return
+            after = SQL("AND (so.date_order, so.id) > (%s, %s)", rows[-1][2], rows[-1][0])
+
+    @api.model
+    def _get_commission_api_columns(self):
+        # field yang boleh diminta lewat API agent -> kolom SQL
+        return {
+            "order": SQL("so.name"),
+            "date": SQL("so.date_order"),
+            "currency": SQL("cur.name"),
+            "amount_untaxed": SQL("so.amount_untaxed"),
+            "commission_rate": SQL("so.commission_rate"),
+            "commission_amount": SQL("so.commission_amount"),
+            "commission_status": SQL("so.commission_status"),
+            "invoice": SQL("am.name"),
+        }
+
+    @api.model
+    def _get_commission_api_page(self, agent_id, field_names, limit=100, after=None):
+        """One page of the confirmed agent sales of an agent, for the agent API.
+
+        Keyset pagination on ``(date_order, id)`` over the partial
+        ``is_agent_sale`` agent index: one range scan of ``limit + 1`` rows
+        whatever the page, only the requested columns are read.
+
+        :param field_names: keys of :meth:`_get_commission_api_columns`
+        :param after: ``(date_order, id)`` of the last row of the previous page
+        :return: tuple ``(rows, next_key)``, ``rows`` as dicts and ``next_key``
+            the ``after`` of the next page or None on the last page
+        """
+        columns = self._get_commission_api_columns()
+        self.flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT so.id, so.date_order, %(columns)s
+              FROM sale_order so
+              JOIN res_currency cur ON cur.id = so.currency_id
+         LEFT JOIN account_move am ON am.id = so.commission_invoice_id
+             WHERE so.is_agent_sale
+               AND so.agent_id = %(agent_id)s
+               AND so.state = 'sale'
+               %(after)s
+          ORDER BY so.date_order, so.id
+             LIMIT %(limit)s
+        """, columns=SQL(", ").join(columns[name] for name in field_names), agent_id=agent_id,
+            after=SQL("AND (so.date_order, so.id) > (%s, %s)", *after) if after else SQL(),
+            limit=limit + 1))
+        rows = self.env.cr.fetchall()
+        next_key = None
+        if len(rows) > limit:
+            last_id, last_date = rows[limit - 1][:2]
+            next_key = (last_date, last_id)
+        page = []
+        for row in rows[:limit]:
+            values = {}
+            for name, value in zip(field_names, row[2:]):
+                if name == "date":
+                    value = fields.Datetime.to_string(value)
+                elif isinstance(value, Decimal):
+                    value = float(value)
+                values[name] = value
+            page.append(values)
+        return page, next_key
+
+    @api.model
+    def _stream_commission_statement(self, file_format, role, partner_id, date_from, date_to, batch_size=2000):
+        """Render a commission statement as CSV or XLSX, chunk by chunk.
+
+        :param file_format: ``"csv"`` or ``"xlsx"``
+        :return: generator of ``bytes``
+        """
+        header = self._get_commission_statement_header()
+        batches = self._iter_commission_statement_rows(role, partner_id, date_from, date_to, batch_size)
+        if file_format == "xlsx":
+            return self._stream_commission_statement_xlsx(header, batches)
+        return self._stream_commission_statement_csv(header, batches)
+
+    @api.model
+    def _stream_commission_statement_csv(self, header, batches):
+        # header langsung dikirim, tiap batch ditulis terus dibuang dari buffer
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        yield ("\ufeff" + buffer.getvalue()).encode()
+        for rows in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+
+    @api.model
+    def _stream_commission_statement_xlsx(self, header, batches, chunk_size=65536):
+        # xlsx itu zip, baru bisa dikirim kalo udah selesai ditulis.
+        # constant_memory: tiap baris langsung di-flush ke temp file
+        with tempfile.TemporaryFile() as tmp:
+            workbook = xlsxwriter.Workbook(tmp, {"constant_memory": True, "in_memory": False})
+            sheet = workbook.add_worksheet(_("Statement"))
+            bold = workbook.add_format({"bold": True})
+            sheet.set_column(1, 1, 20, workbook.add_format({"num_format": "yyyy-mm-dd hh:mm"}))
+            sheet.set_column(6, 9, 16, workbook.add_format({"num_format": "#,##0.00"}))
+            sheet.write_row(0, 0, header, bold)
+            row_index = 1
+            for rows in batches:
+                for row in rows:
+                    sheet.write_row(row_index, 0, row)
+                    row_index += 1
+            workbook.close()
+
+            tmp.seek(0)
+            while chunk := tmp.read(chunk_size):
+                yield chunk
+
+    @instrument("get_revenue_account")
+    def _get_revenue_account(self):
+        # cari revenue account buat invoice line, per company
+        company = self.company_id[:1] or self.env.company
+        account_id = self._get_revenue_account_id(company.id)
+        if not account_id:
+            raise UserError(_("Ga ada revenue account, tolong setup chart of accounts dulu"))
+        return self.env["account.account"].browse(account_id)
+
+    @api.model
+    @tools.ormcache("company_id")
+    def _get_revenue_account_id(self, company_id):
+        # di-cache per company, di-clear kalo account / setting company berubah
+        company = self.env["res.company"].sudo().browse(company_id)
+        account = company.commission_revenue_account_id
+        if account and not account.deprecated:
+            return account.id
+
+        Account = self.env["account.account"].sudo().with_company(company)
+        company_domain = Account._check_company_domain(company) + [("deprecated", "=", False)]
+        acc = Account.search(company_domain + [("code", "=like", "41%")], limit=1)
         if acc:
-            return acc
-        
+            return acc.id
+
         # kalo ga ada, coba cari income account
-        acc = self.env["account.account"].search(
-            [("account_type", "=", "income")],
-            limit=1
-        )
-        if acc:
-            return acc
-        
-        raise UserError(_("Ga ada revenue account, tolong setup chart of accounts dulu"))
+        acc = Account.search(company_domain + [("account_type", "=", "income")], limit=1)
+        return acc.id
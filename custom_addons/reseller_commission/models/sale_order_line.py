@@ -0,0 +1,42 @@
+from odoo import models, fields, api
+
+
+class SaleOrderLine(models.Model):
+    _inherit = "sale.order.line"
+
+    commission_base = fields.Monetary(
+        string="Dasar Komisi",
+        compute="_compute_commission_base", store=True,
+        currency_field="currency_id",
+        help="Subtotal yang kena komisi, 0 buat ongkir / down payment / produk non komisi",
+    )
+    commission_amount = fields.Monetary(
+        string="Komisi",
+        compute="_compute_commission_amount", store=True,
+        currency_field="currency_id",
+        help="Bagian komisi order sesuai porsi dasar komisi line ini",
+    )
+
+    def _is_commission_excluded(self):
+        self.ensure_one()
+        return bool(
+            not self.order_id.is_agent_sale
+            or self.display_type
+            or self.is_downpayment
+            or self._is_delivery()
+            or self.product_id.commission_exclude
+        )
+
+    @api.depends("price_subtotal", "display_type", "is_downpayment", "product_id.commission_exclude", "order_id.is_agent_sale")
+    def _compute_commission_base(self):
+        for line in self:
+            line.commission_base = 0.0 if line._is_commission_excluded() else line.price_subtotal
+
+    @api.depends("commission_base", "order_id.commission_amount", "order_id.commission_base")
+    def _compute_commission_amount(self):
+        allocations = {}
+        for line in self:
+            order = line.order_id
+            if order not in allocations:
+                allocations[order] = order._get_commission_line_amounts()
+            line.commission_amount = allocations[order].get(line, 0.0)
@@ -0,0 +1 @@
+from . import reseller_commission_report
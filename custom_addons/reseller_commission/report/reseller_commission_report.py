@@ -0,0 +1,83 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+from odoo.tools.sql import drop_view_if_exists
+
+
+class ResellerCommissionReport(models.Model):
+    _name = "reseller.commission.report"
+    _description = "Commission Analysis"
+    _auto = False
+    _rec_name = "date"
+    _order = "date desc"
+
+    date = fields.Date(string="Bulan", readonly=True)
+    agent_id = fields.Many2one("res.partner", string="Agent", readonly=True)
+    principal_id = fields.Many2one("res.partner", string="Principal", readonly=True)
+    company_id = fields.Many2one("res.company", string="Company", readonly=True)
+    currency_id = fields.Many2one("res.currency", string="Currency", readonly=True)
+    company_currency_id = fields.Many2one("res.currency", string="Company Currency", readonly=True)
+    commission_status = fields.Selection(
+        [("draft", "Draft"), ("confirmed", "Confirmed"), ("invoiced", "Invoiced"), ("paid", "Paid"),
+         ("reversed", "Reversed")],
+        string="Commission Status", readonly=True,
+    )
+    order_count = fields.Integer(string="# Orders", readonly=True)
+    amount_untaxed = fields.Monetary(string="Untaxed Amount", readonly=True, currency_field="currency_id")
+    commission_amount = fields.Monetary(string="Commission Amount", readonly=True, currency_field="currency_id")
+    commission_amount_company = fields.Monetary(
+        string="Komisi (Currency Company)", readonly=True, currency_field="company_currency_id",
+    )
+
+    def _query(self):
+        # satu baris per agent x principal x company x currency x bulan x status
+        return SQL("""
+            SELECT row_number() OVER (ORDER BY month, so.agent_id, so.principal_id,
+                                      so.company_id, so.currency_id, so.commission_status) AS id,
+                   month AS date,
+                   so.agent_id,
+                   so.principal_id,
+                   so.company_id,
+                   so.currency_id,
+                   comp.currency_id AS company_currency_id,
+                   so.commission_status,
+                   COUNT(*) AS order_count,
+                   SUM(so.amount_untaxed) AS amount_untaxed,
+                   SUM(so.commission_amount) AS commission_amount,
+                   SUM(so.commission_amount_company) AS commission_amount_company
+              FROM sale_order so
+              JOIN res_company comp ON comp.id = so.company_id,
+                   LATERAL (SELECT date_trunc('month', so.date_order)::date AS month) m
+             WHERE so.is_agent_sale
+               AND so.state != 'cancel'
+          GROUP BY month, so.agent_id, so.principal_id, so.company_id, comp.currency_id, so.currency_id, so.commission_status
+        """)
+
+    def init(self):
+        # materialized view, di-refresh sama cron biar pivot/graph ga scan sale_order
+        drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            "CREATE MATERIALIZED VIEW %s AS (%s)",
+            SQL.identifier(self._table), self._query(),
+        ))
+        # unique index wajib buat REFRESH ... CONCURRENTLY
+        self.env.cr.execute(SQL(
+            "CREATE UNIQUE INDEX %s ON %s (id)",
+            SQL.identifier(f"{self._table}_id_idx"), SQL.identifier(self._table),
+        ))
+        self.env.cr.execute(SQL(
+            "CREATE INDEX %s ON %s (date, agent_id)",
+            SQL.identifier(f"{self._table}_date_agent_idx"), SQL.identifier(self._table),
+        ))
+
+    @api.model
+    def _refresh(self):
+        self.env["sale.order"].flush_model()
+        self.env.cr.execute(SQL(
+            "REFRESH MATERIALIZED VIEW CONCURRENTLY %s",
+            SQL.identifier(self._table),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh(self):
+        self._refresh()
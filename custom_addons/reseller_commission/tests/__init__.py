@@ -1,2 +1,26 @@
 from . import test_partner_commission
 from . import test_sale_order_commission
+from . import test_commission_invoice_batch
+from . import test_commission_settlement
+from . import test_revenue_account
+from . import test_commission_indexes
+from . import test_commission_recompute
+from . import test_commission_report
+from . import test_commission_queue
+from . import test_commission_paid_sync
+from . import test_commission_concurrency
+from . import test_commission_benchmark
+from . import test_commission_query_count
+from . import test_commission_rate_default
+from . import test_commission_rate_history
+from . import test_commission_rule
+from . import test_commission_line
+from . import test_commission_statement
+from . import test_commission_currency
+from . import test_commission_summary
+from . import test_commission_instrumentation
+from . import test_commission_partner_picker
+from . import test_commission_reversal
+from . import test_commission_ledger
+from . import test_commission_import
+from . import test_commission_api
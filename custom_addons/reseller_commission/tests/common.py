@@ -0,0 +1,51 @@
+from odoo.tests import TransactionCase
+
+
+class CommissionCommon(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.so_m = cls.env["sale.order"]
+        cls.partner_m = cls.env["res.partner"]
+
+        cls.pt_b = cls.partner_m.create({
+            "name": "PT B",
+            "is_principal": True,
+        })
+        cls.pt_a = cls.partner_m.create({
+            "name": "PT A",
+            "is_agent": True,
+            "commission_rate": 10.0,
+        })
+        cls.cust = cls.partner_m.create({
+            "name": "Customer ABC",
+        })
+        cls.prod = cls.env["product.product"].create({
+            "name": "Product Test",
+            "list_price": 1000000.0,
+            "type": "consu",
+        })
+
+        cls.revenue_acc = cls.env["account.account"].create({
+            "name": "Revenue Komisi",
+            "code": "410099",
+            "account_type": "income",
+        })
+
+    @classmethod
+    def _create_agent_so(cls, **vals):
+        values = {
+            "partner_id": cls.cust.id,
+            "is_agent_sale": True,
+            "agent_id": cls.pt_a.id,
+            "principal_id": cls.pt_b.id,
+            "commission_rate": 10.0,
+            "order_line": [(0, 0, {
+                "product_id": cls.prod.id,
+                "product_uom_qty": 10.0,
+                "price_unit": 1000000.0,
+            })],
+        }
+        values.update(vals)
+        return cls.so_m.create(values)
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from odoo.tests import HttpCase, new_test_user, tagged
+
+from .common import CommissionCommon
+
+
+class TestCommissionApiPage(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls.so_m.concat(*(cls._create_agent_so() for _i in range(5)))
+        cls.orders.action_confirm()
+        # dua order tanggalnya sama, urutan kedua pakai id
+        for order, day in zip(cls.orders, (3, 1, 1, 2, 5)):
+            order.date_order = datetime(2024, 1, day, 9, 0)
+
+    def _all_pages(self, limit):
+        pages, after = [], None
+        while True:
+            rows, after = self.so_m._get_commission_api_page(self.pt_a.id, ["order", "date"], limit=limit, after=after)
+            pages.append(rows)
+            if not after:
+                return pages
+
+    def test_keyset_order(self):
+        pages = self._all_pages(limit=2)
+        self.assertEqual([len(rows) for rows in pages], [2, 2, 1])
+        names = [row["order"] for rows in pages for row in rows]
+        expected = self.orders.sorted(lambda o: (o.date_order, o.id)).mapped("name")
+        self.assertEqual(names, expected)
+        self.assertEqual(set(pages[0][0]), {"order", "date"})
+
+    def test_page_is_one_query(self):
+        _rows, after = self.so_m._get_commission_api_page(self.pt_a.id, ["order"], limit=3)
+        self.env.flush_all()
+        with self.assertQueryCount(1):
+            rows, after = self.so_m._get_commission_api_page(self.pt_a.id, ["order", "commission_amount"], limit=3, after=after)
+        self.assertEqual(len(rows), 2)
+        self.assertIsNone(after)
+        self.assertEqual(rows[0]["commission_amount"], 1000000.0)
+
+
+@tagged("-at_install", "post_install")
+class TestCommissionApiController(HttpCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agent_user = new_test_user(self.env, login="agent_api", groups="base.group_portal")
+        self.agent_user.partner_id.is_agent = True
+        principal = self.env["res.partner"].create({"name": "PT B API", "is_principal": True})
+        customer = self.env["res.partner"].create({"name": "Customer API"})
+        product = self.env["product.product"].create({"name": "Produk API", "list_price": 100.0})
+        orders = self.env["sale.order"].create([{
+            "partner_id": customer.id,
+            "is_agent_sale": True,
+            "agent_id": self.agent_user.partner_id.id,
+            "principal_id": principal.id,
+            "commission_rate": 10.0,
+            "order_line": [(0, 0, {"product_id": product.id, "product_uom_qty": 1.0, "price_unit": 100.0})],
+        } for _i in range(3)])
+        orders.action_confirm()
+
+    def test_pages_and_etag(self):
+        self.authenticate("agent_api", "agent_api")
+        url = "/reseller_commission/api/commissions?limit=2&fields=order,commission_amount"
+        response = self.url_open(url)
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(len(payload["data"]), 2)
+        self.assertEqual(set(payload["data"][0]), {"order", "commission_amount"})
+        self.assertTrue(payload["next_cursor"])
+
+        response = self.url_open(url, headers={"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.url_open(f"/reseller_commission/api/commissions?limit=2&cursor={payload['next_cursor']}")
+        self.assertEqual(len(response.json()["data"]), 1)
+        self.assertIsNone(response.json()["next_cursor"])
+
+        response = self.url_open("/reseller_commission/api/commissions?fields=partner_id")
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_agent(self):
+        new_test_user(self.env, login="not_agent_api", groups="base.group_portal")
+        self.authenticate("not_agent_api", "not_agent_api")
+        response = self.url_open("/reseller_commission/api/commissions")
+        self.assertEqual(response.status_code, 403)
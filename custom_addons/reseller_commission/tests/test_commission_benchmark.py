@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import time
+import tracemalloc
+
+from odoo.tests.common import tagged
+
+from .common import CommissionCommon
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "-at_install", "post_install", "reseller_commission_benchmark")
+class TestCommissionBenchmark(CommissionCommon):
+    """Cost of the commission hot paths on generated data.
+
+    Excluded from normal runs, jalanin pakai::
+
+        RESELLER_COMMISSION_BENCH_SIZES=1000,10000 \\
+        RESELLER_COMMISSION_BENCH_OUTPUT=bench.json \\
+        RESELLER_COMMISSION_BENCH_BASELINE=bench_prev.json \\
+        odoo-bin --test-tags reseller_commission_benchmark ...
+
+    Hasil per operasi: wall time, query count dan peak memory per record,
+    ditulis ke JSON. Kalo ada baseline, operasi yang lebih lambat dari
+    ``REGRESSION_TOLERANCE`` di-log sebagai warning.
+    """
+
+    REGRESSION_TOLERANCE = 1.2
+    SINGLE_INVOICE_SAMPLE = 100
+
+    def _measure(self, results, size, name, count, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        tracemalloc.start()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        func()
+        self.env.flush_all()
+        wall = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        count = max(count, 1)
+        results.setdefault(str(size), {})[name] = {
+            "records": count,
+            "wall_s": round(wall, 4),
+            "ms_per_record": round(1000.0 * wall / count, 4),
+            "queries": queries,
+            "queries_per_record": round(queries / count, 3),
+            "peak_kib_per_record": round(peak / 1024.0 / count, 3),
+        }
+        _logger.info("benchmark %s n=%s: %s", name, size, results[str(size)][name])
+
+    def _generate(self, size):
+        agents = self.partner_m.create([
+            {"name": f"Bench Agent {i}", "is_agent": True, "commission_rate": 5.0 + i % 10}
+            for i in range(max(size // 100, 1))
+        ])
+        principals = self.partner_m.create([
+            {"name": f"Bench Principal {i}", "is_principal": True}
+            for i in range(max(size // 1000, 1))
+        ])
+        vals_list = [{
+            "partner_id": self.cust.id,
+            "is_agent_sale": True,
+            "agent_id": agents[i % len(agents)].id,
+            "principal_id": principals[i % len(principals)].id,
+            "commission_rate": 10.0,
+            "order_line": [(0, 0, {
+                "product_id": self.prod.id,
+                "product_uom_qty": 1.0 + i % 5,
+                "price_unit": 100000.0,
+            })],
+        } for i in range(size)]
+        orders = self.so_m
+        for start in range(0, size, 1000):
+            orders |= self.so_m.create(vals_list[start:start + 1000])
+        return agents, orders
+
+    def _compare(self, results):
+        path = os.environ.get("RESELLER_COMMISSION_BENCH_BASELINE")
+        if not path or not os.path.exists(path):
+            return
+        with open(path) as f:
+            baseline = json.load(f)
+        for size, operations in results.items():
+            for name, current in operations.items():
+                previous = baseline.get(size, {}).get(name)
+                if not previous:
+                    continue
+                for metric in ("ms_per_record", "queries_per_record"):
+                    if current[metric] > previous[metric] * self.REGRESSION_TOLERANCE:
+                        _logger.warning(
+                            "benchmark regression %s n=%s %s: %s -> %s",
+                            name, size, metric, previous[metric], current[metric],
+                        )
+
+    def test_benchmark(self):
+        sizes = [int(s) for s in os.environ.get("RESELLER_COMMISSION_BENCH_SIZES", "1000").split(",")]
+        results = {}
+        for size in sizes:
+            agents, orders = self._generate(size)
+            sample = orders[:self.SINGLE_INVOICE_SAMPLE]
+
+            self._measure(results, size, "compute_commission", size, orders._compute_commission)
+            self._measure(results, size, "partner_constraint", len(agents), agents._check_commission_rate)
+            self._measure(results, size, "action_confirm", size, orders.action_confirm)
+            self._measure(
+                results, size, "action_create_commission_invoice", len(sample),
+                lambda: [order.action_create_commission_invoice() for order in sample],
+            )
+            self._measure(
+                results, size, "create_commission_invoices_batch", size - len(sample),
+                lambda: (orders - sample)._create_commission_invoices(),
+            )
+
+        self._compare(results)
+        output = os.environ.get("RESELLER_COMMISSION_BENCH_OUTPUT", "reseller_commission_benchmark.json")
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        _logger.info("benchmark written to %s", output)
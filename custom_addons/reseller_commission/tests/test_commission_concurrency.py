@@ -0,0 +1,89 @@
+import threading
+
+from psycopg2.errors import SerializationFailure
+
+from odoo import api, SUPERUSER_ID
+from odoo.exceptions import UserError
+from odoo.modules.registry import Registry
+from odoo.tests.common import BaseCase, get_db_name, tagged
+
+
+@tagged("-standard", "-at_install", "post_install", "reseller_commission_concurrency")
+class TestCommissionInvoiceConcurrency(BaseCase):
+    """Two workers clicking "Make Invoice" at the same time.
+
+    Runs on real committed transactions (no test cursor), that's why it is
+    excluded from the default run:
+    ``odoo-bin --test-tags reseller_commission_concurrency``
+    """
+
+    THREADS = 4
+
+    def setUp(self):
+        super().setUp()
+        self.registry = Registry(get_db_name())
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            principal = env["res.partner"].create({"name": "PT B Concurrency", "is_principal": True})
+            agent = env["res.partner"].create({"name": "PT A Concurrency", "is_agent": True})
+            customer = env["res.partner"].create({"name": "Customer Concurrency"})
+            product = env["product.product"].create({"name": "Product Concurrency", "type": "consu"})
+            order = env["sale.order"].create({
+                "partner_id": customer.id,
+                "is_agent_sale": True,
+                "agent_id": agent.id,
+                "principal_id": principal.id,
+                "commission_rate": 10.0,
+                "order_line": [(0, 0, {
+                    "product_id": product.id,
+                    "product_uom_qty": 1.0,
+                    "price_unit": 1000.0,
+                })],
+            })
+            order.action_confirm()
+            self.order_id = order.id
+            self.partner_ids = (principal | agent | customer).ids
+            self.template_id = product.product_tmpl_id.id
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            cr.execute("DELETE FROM account_move WHERE invoice_origin = (SELECT name FROM sale_order WHERE id = %s)", [self.order_id])
+            cr.execute("DELETE FROM reseller_commission_ledger WHERE order_id = %s", [self.order_id])
+            cr.execute("DELETE FROM sale_order WHERE id = %s", [self.order_id])
+            cr.execute("DELETE FROM product_template WHERE id = %s", [self.template_id])
+            cr.execute("DELETE FROM res_partner WHERE id = ANY(%s)", [self.partner_ids])
+
+    def _make_invoice(self, barrier, results):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            order = env["sale.order"].browse(self.order_id)
+            # semua thread liat order masih "confirmed" tanpa invoice
+            order._get_commission_invoice_error()
+            barrier.wait()
+            try:
+                order.action_create_commission_invoice()
+                results.append("invoiced")
+            except (UserError, SerializationFailure):
+                cr.rollback()
+                results.append("rejected")
+
+    def test_only_one_invoice(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        threads = [
+            threading.Thread(target=self._make_invoice, args=(barrier, results))
+            for _i in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+
+        self.assertEqual(sorted(results), ["invoiced"] + ["rejected"] * (self.THREADS - 1))
+        with self.registry.cursor() as cr:
+            cr.execute("""
+                SELECT COUNT(*) FROM account_move
+                 WHERE invoice_origin = (SELECT name FROM sale_order WHERE id = %s)
+            """, [self.order_id])
+            self.assertEqual(cr.fetchone()[0], 1)
@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+from odoo import fields
+
+from .common import CommissionCommon
+
+
+class TestCommissionCurrency(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.foreign = cls.env["res.currency"].create({
+            "name": "KMS",
+            "symbol": "K",
+            "rounding": 0.01,
+        })
+        # 1 currency company = 0.5 KMS -> 1 KMS = 2 currency company
+        cls.env["res.currency.rate"].create({
+            "currency_id": cls.foreign.id,
+            "company_id": cls.company.id,
+            "name": fields.Date.today(),
+            "rate": 0.5 * cls.company.currency_id.rate,
+        })
+        cls.pricelist = cls.env["product.pricelist"].create({
+            "name": "Pricelist KMS",
+            "currency_id": cls.foreign.id,
+        })
+
+    def _create_foreign_so(self, **vals):
+        return self._create_agent_so(pricelist_id=self.pricelist.id, **vals)
+
+    def test_rate_locked_at_confirm(self):
+        so = self._create_foreign_so()
+        self.assertEqual(so.currency_id, self.foreign)
+        self.assertEqual(so.commission_amount_company, 0.0)
+
+        so.action_confirm()
+        self.assertAlmostEqual(so.commission_currency_rate, 2.0)
+        self.assertAlmostEqual(so.commission_amount_company, 2 * so.commission_amount)
+
+        # kurs baru ga ngubah order yang udah confirm, recompute pakai kurs yang dikunci
+        self.env["res.currency.rate"].search([("currency_id", "=", self.foreign.id)]).rate *= 2
+        self.so_m._recompute_commission_amount_sql([("id", "=", so.id)], rate=5.0)
+        self.assertAlmostEqual(so.commission_amount, 500000.0)
+        self.assertAlmostEqual(so.commission_amount_company, 1000000.0)
+
+    def test_company_currency_rate_is_one(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        self.assertEqual(so.commission_currency_rate, 1.0)
+        self.assertEqual(so.commission_amount_company, so.commission_amount)
+
+    def test_rates_read_once_per_company_and_date(self):
+        orders = self.so_m.concat(*(self._create_foreign_so() for _i in range(5)))
+        orders |= self._create_agent_so()
+        Currency = type(self.env["res.currency"])
+        with patch.object(Currency, "_get_rates", autospec=True, side_effect=Currency._get_rates) as get_rates:
+            rates = orders._get_commission_currency_rates()
+        self.assertEqual(get_rates.call_count, 1)
+        self.assertEqual(len(set(rates.values())), 2)
+
+    def test_mixed_currency_sum(self):
+        foreign = self._create_foreign_so()
+        local = self._create_agent_so()
+        (foreign | local).action_confirm()
+        self.env.flush_all()
+        self.env.cr.execute(
+            "SELECT SUM(commission_amount_company) FROM sale_order WHERE id = ANY(%s)",
+            [(foreign | local).ids],
+        )
+        self.assertAlmostEqual(float(self.env.cr.fetchone()[0]), 2 * 1000000.0 + 1000000.0)
@@ -0,0 +1,87 @@
+import base64
+from unittest.mock import patch
+
+from .common import CommissionCommon
+
+
+class TestCommissionImport(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pt_a.ref = "AGT-A"
+        cls.pt_b.ref = "PRC-B"
+        cls.cust.ref = "CUST-1"
+        cls.prod.default_code = "BIBIT-01"
+
+    def _row(self, ref, **vals):
+        row = {
+            "ref": ref,
+            "date_order": "2024-03-15 10:00:00",
+            "customer": "CUST-1",
+            "agent": "AGT-A",
+            "principal": "PRC-B",
+            "commission_rate": 10.0,
+            "lines": [{"product": "BIBIT-01", "quantity": 2, "price_unit": 500000.0}],
+        }
+        row.update(vals)
+        return row
+
+    def test_load_with_row_errors(self):
+        result = self.so_m.load_agent_sales([
+            self._row("UP-1"),
+            self._row("UP-2", agent="PRC-B"),
+            self._row("UP-3", commission_rate=150.0),
+            self._row("UP-4", lines=[{"product": "NOPE"}]),
+            self._row("UP-5", commission_rate=5.0),
+        ], confirm=True)
+
+        self.assertEqual([error["row"] for error in result["errors"]], [1, 2, 3])
+        self.assertEqual(result["errors"][0]["ref"], "UP-2")
+        orders = self.so_m.browse(result["created"])
+        self.assertEqual(orders.mapped("client_order_ref"), ["UP-1", "UP-5"])
+        self.assertEqual(set(orders.mapped("state")), {"sale"})
+        self.assertEqual(set(orders.mapped("commission_status")), {"confirmed"})
+        self.assertEqual(orders.mapped("commission_amount"), [100000.0, 50000.0])
+        # tanggal dari upstream ga ketimpa confirm
+        self.assertEqual(str(orders[0].date_order), "2024-03-15 10:00:00")
+
+    def test_reload_is_rejected(self):
+        self.so_m.load_agent_sales([self._row("UP-1")])
+        result = self.so_m.load_agent_sales([self._row("UP-1"), self._row("UP-1-B"), self._row("UP-1-B")])
+        self.assertEqual(len(result["created"]), 1)
+        self.assertEqual([error["row"] for error in result["errors"]], [0, 2])
+
+    def test_confirm_error_removes_order(self):
+        # rate 0 lolos constraint tapi ga bisa di-confirm
+        self.pt_a.commission_rate = 0.0
+        result = self.so_m.load_agent_sales([self._row("UP-0", commission_rate=0.0)], confirm=True)
+        self.assertFalse(result["created"])
+        self.assertEqual(len(result["errors"]), 1)
+        self.assertFalse(self.so_m.search([("client_order_ref", "=", "UP-0")]))
+
+    def test_csv_wizard(self):
+        data = (
+            "ref,date_order,customer,agent,principal,commission_rate,product,quantity,price_unit\n"
+            "UP-9,2024-03-15,CUST-1,AGT-A,PRC-B,10,BIBIT-01,1,1000000\n"
+            "UP-9,2024-03-15,CUST-1,AGT-A,PRC-B,10,BIBIT-01,3,1000000\n"
+            "UP-10,2024-03-15,CUST-1,NOPE,PRC-B,10,BIBIT-01,1,1000000\n"
+        )
+        wizard = self.env["reseller.commission.import.wizard"].create({
+            "file": base64.b64encode(data.encode()),
+            "filename": "orders.csv",
+        })
+        wizard.action_import()
+        self.assertEqual(wizard.state, "done")
+        self.assertIn("UP-10", wizard.result)
+        order = self.so_m.search([("client_order_ref", "=", "UP-9")])
+        self.assertEqual(len(order.order_line), 2)
+        self.assertEqual(order.commission_amount, 400000.0)
+
+    def test_lookup_per_batch(self):
+        Partner = type(self.env["res.partner"])
+        with patch.object(Partner, "search_fetch", autospec=True, side_effect=Partner.search_fetch) as search:
+            result = self.so_m.load_agent_sales([self._row(f"UP-Q{i}") for i in range(20)])
+        self.assertEqual(len(result["created"]), 20)
+        ref_lookups = [call for call in search.call_args_list if call.args[1] and call.args[1][0][0] == "ref"]
+        self.assertEqual(len(ref_lookups), 1)
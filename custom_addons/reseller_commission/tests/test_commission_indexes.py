@@ -0,0 +1,56 @@
+from odoo.tools.sql import index_exists
+
+from .common import CommissionCommon
+
+
+class TestCommissionIndexes(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        orders = cls.so_m
+        for rate in range(1, 21):
+            orders |= cls._create_agent_so(commission_rate=rate)
+        orders[:10].action_confirm()
+        cls.env.flush_all()
+        cls.env.cr.execute("ANALYZE sale_order")
+
+    def _plan(self, query, params):
+        # dataset test kecil, jadi seq scan dimatiin biar keliatan index mana yang kepake
+        self.env.cr.execute("SET LOCAL enable_seqscan = off")
+        self.env.cr.execute("EXPLAIN " + query, params)
+        return "\n".join(row[0] for row in self.env.cr.fetchall())
+
+    def test_indexes_exist(self):
+        for name in (
+            "sale_order_commission_open_idx",
+            "sale_order_agent_sale_agent_idx",
+            "sale_order_agent_sale_principal_idx",
+            "sale_order_agent_sale_ref_idx",
+        ):
+            self.assertTrue(index_exists(self.env.cr, name), name)
+
+    def test_open_commission_uses_partial_index(self):
+        plan = self._plan("""
+            SELECT id FROM sale_order
+             WHERE commission_status = 'confirmed'
+               AND commission_invoice_id IS NULL
+               AND principal_id = %s
+        """, [self.pt_b.id])
+        self.assertIn("sale_order_commission_open_idx", plan)
+
+    def test_agent_statement_uses_partial_index(self):
+        plan = self._plan("""
+            SELECT id FROM sale_order
+             WHERE is_agent_sale AND agent_id = %s
+             ORDER BY date_order, id
+        """, [self.pt_a.id])
+        self.assertIn("sale_order_agent_sale_agent_idx", plan)
+
+    def test_principal_statement_uses_partial_index(self):
+        plan = self._plan("""
+            SELECT id FROM sale_order
+             WHERE is_agent_sale AND principal_id = %s
+             ORDER BY date_order, id
+        """, [self.pt_b.id])
+        self.assertIn("sale_order_agent_sale_principal_idx", plan)
@@ -0,0 +1,42 @@
+from .common import CommissionCommon
+
+
+class TestCommissionInstrumentation(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.metric_m = cls.env["reseller.commission.metric"]
+        cls.icp = cls.env["ir.config_parameter"].sudo()
+
+    def _metrics(self):
+        self.metric_m.invalidate_model()
+        return {metric.name: metric for metric in self.metric_m.search([])}
+
+    def test_disabled_records_nothing(self):
+        self.icp.set_param("reseller_commission.instrumentation", False)
+        self._create_agent_so().action_confirm()
+        self.assertFalse(self._metrics())
+
+    def test_enabled_records_samples(self):
+        self.icp.set_param("reseller_commission.instrumentation", True)
+        orders = self._create_agent_so() | self._create_agent_so()
+        with self.assertLogs("odoo.addons.reseller_commission.tools.instrumentation", "INFO") as logs:
+            orders.action_confirm()
+            orders[0].action_create_commission_invoice()
+
+        metrics = self._metrics()
+        self.assertEqual(metrics["action_confirm"].record_count, 2)
+        self.assertGreater(metrics["action_confirm"].query_count, 0)
+        self.assertGreaterEqual(metrics["action_confirm"].duration_ms, 0.0)
+        self.assertEqual(metrics["action_create_commission_invoice"].record_count, 1)
+        self.assertIn("get_revenue_account", metrics)
+        self.assertIn("compute_commission", metrics)
+        self.assertTrue(any("commission_metric name=action_confirm records=2" in line for line in logs.output))
+
+    def test_gc(self):
+        self.icp.set_param("reseller_commission.instrumentation", True)
+        self._create_agent_so().action_confirm()
+        self.env.cr.execute("UPDATE reseller_commission_metric SET create_date = create_date - interval '60 days'")
+        self.metric_m._gc_metrics()
+        self.assertFalse(self._metrics())
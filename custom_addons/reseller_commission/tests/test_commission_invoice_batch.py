@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+
+from .common import CommissionCommon
+
+
+class TestCommissionInvoiceBatch(CommissionCommon):
+
+    def test_batch_invoice_all_valid(self):
+        orders = self._create_agent_so() | self._create_agent_so() | self._create_agent_so()
+        orders.action_confirm()
+
+        invoices, skipped = orders._create_commission_invoices()
+
+        self.assertEqual(len(invoices), 3)
+        self.assertFalse(skipped)
+        self.assertEqual(set(invoices.mapped("state")), {"posted"})
+        self.assertEqual(set(orders.mapped("commission_status")), {"invoiced"})
+        for order in orders:
+            self.assertEqual(order.commission_invoice_id.amount_total, 1000000.0)
+            self.assertEqual(order.commission_invoice_id.partner_id, self.pt_b)
+
+    def test_batch_invoice_skip_invalid(self):
+        ok = self._create_agent_so()
+        draft = self._create_agent_so()
+        regular = self.so_m.create({"partner_id": self.cust.id})
+        ok.action_confirm()
+
+        invoices, skipped = (ok | draft | regular)._create_commission_invoices()
+
+        self.assertEqual(invoices, ok.commission_invoice_id)
+        self.assertEqual(set(skipped), {draft, regular})
+        self.assertFalse(draft.commission_invoice_id)
+
+    def test_batch_post_failure_per_order(self):
+        ok = self._create_agent_so()
+        bad = self._create_agent_so()
+        (ok | bad).action_confirm()
+        Move = type(self.env["account.move"])
+        action_post = Move.action_post
+
+        def action_post_failing(moves):
+            if bad.name in moves.mapped("invoice_origin"):
+                raise UserError("Periode terkunci")
+            return action_post(moves)
+
+        # invoice yang gagal di-post cuma bikin order-nya yang di-skip
+        with patch.object(Move, "action_post", action_post_failing):
+            invoices, skipped = (ok | bad)._create_commission_invoices()
+
+        self.assertEqual(invoices, ok.commission_invoice_id)
+        self.assertEqual(invoices.state, "posted")
+        self.assertEqual(ok.commission_status, "invoiced")
+        self.assertEqual(set(skipped), {bad})
+        self.assertFalse(bad.commission_invoice_id)
+        self.assertEqual(bad.commission_status, "confirmed")
+        self.assertIn("Periode terkunci", bad.commission_invoice_error)
+        self.assertFalse(self.env["account.move"].search([("invoice_origin", "=", bad.name)]))
+
+    def test_batch_action_notification(self):
+        ok = self._create_agent_so()
+        ok.action_confirm()
+        ok.action_create_commission_invoice()
+
+        # kedua kali harus di-skip, bukan error
+        res = ok.action_create_commission_invoice_batch()
+        self.assertEqual(res["tag"], "display_notification")
+        self.assertEqual(res["params"]["type"], "warning")
+        self.assertIn(ok.name, res["params"]["message"])
+
+    def test_single_still_raises(self):
+        so = self._create_agent_so()
+        with self.assertRaises(UserError):
+            so.action_create_commission_invoice()
+
+    def test_batch_locks_rows(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        # lock sendiri ga nge-skip order, lock punya transaksi lain yang di-skip
+        self.assertEqual(so._lock_commission_orders(), so)
+        self.assertEqual(so._lock_commission_orders(nowait=True), so)
@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.exceptions import UserError
+
+from .common import CommissionCommon
+
+
+class TestCommissionLedger(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ledger_m = cls.env["reseller.commission.ledger"]
+
+    def _rows(self, so):
+        self.env.flush_all()
+        rows = self.ledger_m.search([("order_id", "=", so.id)], order="id")
+        return [(r.event, r.amount_accrued, r.amount_invoiced, r.amount_paid) for r in rows]
+
+    def test_events_follow_transitions(self):
+        so = self._create_agent_so()
+        self.assertEqual(self._rows(so), [])
+
+        so.action_confirm()
+        so.commission_rate = 20.0
+        so.action_create_commission_invoice()
+        so.commission_invoice_id.write({"payment_state": "paid"})
+        self.so_m._sync_commission_paid_status()
+
+        self.assertEqual(self._rows(so), [
+            ("accrued", 1000000.0, 0.0, 0.0),
+            ("adjusted", 1000000.0, 0.0, 0.0),
+            ("invoiced", 0.0, 2000000.0, 0.0),
+            ("paid", 0.0, 0.0, 2000000.0),
+        ])
+        self.assertFalse(self.ledger_m._verify())
+
+    def test_reversal_and_cancel(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        so.action_create_commission_invoice()
+        so._action_cancel()
+        self.assertEqual(self._rows(so)[-1], ("reversed", -1000000.0, -1000000.0, 0.0))
+        self.assertFalse(self.ledger_m._verify())
+
+        # confirmed tapi belum di-invoice, cancel = reversal accrued
+        so2 = self._create_agent_so()
+        so2.action_confirm()
+        so2._action_cancel()
+        self.assertEqual(self._rows(so2)[-1], ("reversed", -1000000.0, 0.0, 0.0))
+
+    def test_balances_as_of(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        so.action_create_commission_invoice()
+        self.env.flush_all()
+
+        today = fields.Date.context_today(self.ledger_m)
+        domain = [("agent_id", "=", self.pt_a.id)]
+        balances = self.ledger_m._get_balances(today, domain)
+        self.assertEqual(balances[self.pt_a, self.pt_b, self.env.company], (1000000.0, 1000000.0, 0.0))
+        self.assertFalse(self.ledger_m._get_balances(today - timedelta(days=1), domain))
+
+    def test_append_only(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        self.env.flush_all()
+        row = self.ledger_m.search([("order_id", "=", so.id)])
+        with self.assertRaises(UserError):
+            row.write({"amount_accrued": 0.0})
+        with self.assertRaises(UserError):
+            row.unlink()
+
+    def test_backfill_orders_without_rows(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        so.action_create_commission_invoice()
+        so._create_commission_reversals({so.id: 300000.0})
+        self.env.flush_all()
+        # order dari sebelum ada ledger
+        self.env.cr.execute("DELETE FROM reseller_commission_ledger WHERE order_id = %s", [so.id])
+        self.ledger_m.invalidate_model()
+        self.assertTrue(self.ledger_m._verify())
+
+        self.assertEqual(self.ledger_m._sync_from_orders(), 0)
+        self.assertFalse(self.ledger_m._verify())
+        self.assertEqual(
+            sorted(self._rows(so)),
+            [("accrued", 1000000.0, 0.0, 0.0), ("invoiced", 0.0, 1000000.0, 0.0), ("reversed", -300000.0, -300000.0, 0.0)],
+        )
+
+    def test_migration_writes_no_rows(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        self.env.flush_all()
+        self.env.cr.execute("DELETE FROM reseller_commission_ledger WHERE order_id = %s", [so.id])
+        self.ledger_m.invalidate_model()
+
+        # backfill migration (kurs 1.0.3) ga nulis ledger, history-nya dibikin sync 1.0.7
+        migration_so = so.with_context(commission_skip_snapshot=True)
+        migration_so.commission_currency_rate = 2.0
+        migration_so.env.flush_all()
+        self.assertFalse(self._rows(so))
+        self.ledger_m._sync_from_orders()
+        self.assertEqual(self._rows(so), [("accrued", 2000000.0, 0.0, 0.0)])
+
+    def test_sync_appends_correction(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        self.env.flush_all()
+        history = self._rows(so)
+        # drift: order diubah di luar ORM / hook
+        self.env.cr.execute(
+            "UPDATE sale_order SET commission_amount_company = commission_amount_company + 500 WHERE id = %s", [so.id],
+        )
+        so.invalidate_recordset()
+
+        self.assertEqual(self.ledger_m._sync_from_orders(), 1)
+        rows = self._rows(so)
+        self.assertEqual(rows[:len(history)], history)
+        self.assertEqual(rows[-1], ("adjusted", 500.0, 0.0, 0.0))
+        self.assertFalse(self.ledger_m._verify())
+        # sync kedua ga nambah apa-apa
+        self.assertEqual(self.ledger_m._sync_from_orders(), 0)
+        self.assertEqual(len(self._rows(so)), len(rows))
+
+    def test_partner_delete_keeps_rows(self):
+        agent = self.partner_m.create({"name": "PT Agen Hapus", "is_agent": True})
+        so = self._create_agent_so(agent_id=agent.id)
+        so.action_confirm()
+        so._action_cancel()
+        so.unlink()
+        self.env.flush_all()
+        rows = self.ledger_m.search([("agent_name", "=", "PT Agen Hapus")])
+        self.assertTrue(rows)
+
+        agent.unlink()
+        self.env.flush_all()
+        rows.invalidate_recordset()
+        self.assertFalse(rows.agent_id)
+        self.assertEqual(set(rows.mapped("agent_name")), {"PT Agen Hapus"})
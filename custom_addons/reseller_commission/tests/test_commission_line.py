@@ -0,0 +1,75 @@
+from .common import CommissionCommon
+
+
+class TestCommissionLine(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.prod_ongkir = cls.env["product.product"].create({
+            "name": "Ongkir",
+            "type": "service",
+            "commission_exclude": True,
+        })
+
+    def _line(self, product, qty=1.0, price=1000000.0):
+        return (0, 0, {"product_id": product.id, "product_uom_qty": qty, "price_unit": price})
+
+    def test_excluded_lines(self):
+        so = self._create_agent_so(order_line=[
+            self._line(self.prod, qty=2.0),
+            self._line(self.prod_ongkir, price=50000.0),
+            (0, 0, {"display_type": "line_section", "name": "Section"}),
+        ])
+        regular, ongkir, section = so.order_line.sorted("id")
+        self.assertEqual(regular.commission_base, 2000000.0)
+        self.assertEqual(ongkir.commission_base, 0.0)
+        self.assertEqual(section.commission_base, 0.0)
+        self.assertEqual(so.commission_base, 2000000.0)
+        self.assertEqual(so.commission_amount, 200000.0)
+        self.assertEqual(regular.commission_amount, 200000.0)
+        self.assertEqual(ongkir.commission_amount, 0.0)
+
+    def test_not_agent_sale(self):
+        so = self.so_m.create({
+            "partner_id": self.cust.id,
+            "order_line": [self._line(self.prod)],
+        })
+        self.assertEqual(so.order_line.commission_base, 0.0)
+        self.assertEqual(so.commission_amount, 0.0)
+
+    def test_lines_add_up_to_order(self):
+        # 3.33% dari 3 = 0.10, per line 0.0333 -> 0.03, sisa pembulatan ke satu line
+        so = self._create_agent_so(
+            commission_rate=3.33, order_line=[self._line(self.prod, price=1.0) for _i in range(3)],
+        )
+        self.assertEqual(so.commission_amount, 0.1)
+        amounts = so.order_line.mapped("commission_amount")
+        self.assertEqual(sorted(amounts), [0.03, 0.03, 0.04])
+        self.assertAlmostEqual(sum(amounts), so.commission_amount)
+
+        so.commission_rate = 5.0
+        self.assertAlmostEqual(sum(so.order_line.mapped("commission_amount")), 0.15)
+
+    def test_line_change_rolls_up(self):
+        so = self._create_agent_so(order_line=[self._line(self.prod), self._line(self.prod)])
+        first, second = so.order_line.sorted("id")
+        first.product_uom_qty = 3.0
+        self.assertEqual(so.commission_base, 4000000.0)
+        self.assertEqual(so.commission_amount, 400000.0)
+        self.assertEqual(first.commission_amount, 300000.0)
+        self.assertEqual(second.commission_amount, 100000.0)
+
+        second.unlink()
+        self.assertEqual(so.commission_amount, 300000.0)
+
+    def test_sql_recompute_matches_orm(self):
+        so = self._create_agent_so(commission_rate=3.33, order_line=[
+            self._line(self.prod, price=333.0), self._line(self.prod, price=667.0), self._line(self.prod_ongkir),
+        ])
+        expected = {line.id: line.commission_amount for line in so.order_line}
+        self.env.cr.execute("UPDATE sale_order_line SET commission_amount = 0 WHERE order_id = %s", [so.id])
+        so.order_line.invalidate_recordset(["commission_amount"])
+
+        self.so_m._recompute_commission_amount_sql([("id", "=", so.id)])
+        self.assertEqual({line.id: line.commission_amount for line in so.order_line}, expected)
@@ -0,0 +1,53 @@
+from .common import CommissionCommon
+
+
+class TestCommissionPaidSync(CommissionCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.so = self._create_agent_so()
+        self.so.action_confirm()
+        self.so.action_create_commission_invoice()
+        self.invoice = self.so.commission_invoice_id
+
+    def test_sync_paid_and_back(self):
+        self.invoice.write({"payment_state": "paid"})
+        synced = self.so_m._sync_commission_paid_status()
+
+        self.assertIn(self.so, synced)
+        self.assertEqual(self.so.commission_status, "paid")
+        self.assertTrue(self.so.commission_paid_date)
+
+        # payment di-unreconcile -> balik invoiced
+        self.invoice.write({"payment_state": "not_paid"})
+        self.so_m._sync_commission_paid_status()
+        self.assertEqual(self.so.commission_status, "invoiced")
+        self.assertFalse(self.so.commission_paid_date)
+
+    def test_sync_skips_unchanged(self):
+        synced = self.so_m._sync_commission_paid_status()
+        self.assertNotIn(self.so, synced)
+        self.assertEqual(self.so.commission_status, "invoiced")
+
+    def test_sync_respects_watermark(self):
+        self.env["ir.config_parameter"].sudo().set_param(
+            "reseller_commission.paid_sync_watermark", "2999-01-01 00:00:00",
+        )
+        self.invoice.write({"payment_state": "paid"})
+        self.so_m._sync_commission_paid_status()
+        self.assertEqual(self.so.commission_status, "invoiced")
+
+    def test_sync_long_transaction_overlap(self):
+        self.so_m._sync_commission_paid_status()
+        watermark = self.env["ir.config_parameter"].sudo().get_param("reseller_commission.paid_sync_watermark")
+        # payment dari transaksi panjang: commit sesudah run tadi, write_date-nya lebih tua
+        self.invoice.write({"payment_state": "paid"})
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE account_move SET write_date = %s::timestamp - interval '30 minutes' WHERE id = %s",
+            [watermark, self.invoice.id],
+        )
+
+        synced = self.so_m._sync_commission_paid_status()
+        self.assertIn(self.so, synced)
+        self.assertEqual(self.so.commission_status, "paid")
@@ -0,0 +1,54 @@
+from .common import CommissionCommon
+
+
+class TestCommissionPartnerPicker(CommissionCommon):
+    """Agent / principal picker: is_agent / is_principal + complete_name search."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.agent_2 = cls.partner_m.create({"name": "PT Agen Bibit", "is_agent": True})
+        cls.not_agent = cls.partner_m.create({"name": "PT Agen Palsu"})
+
+    def _picker(self, name, role="is_agent"):
+        result = self.partner_m.name_search(name, [(role, "=", True)])
+        return {partner_id for partner_id, _name in result}
+
+    def test_picker_only_agents(self):
+        found = self._picker("Agen")
+        self.assertIn(self.agent_2.id, found)
+        self.assertNotIn(self.not_agent.id, found)
+        self.assertNotIn(self.pt_b.id, self._picker(""))
+
+    def test_picker_principal(self):
+        self.assertIn(self.pt_b.id, self._picker("PT B", role="is_principal"))
+        self.assertNotIn(self.pt_a.id, self._picker("PT", role="is_principal"))
+
+    def test_picker_follows_flag(self):
+        self.assertNotIn(self.not_agent.id, self._picker("Palsu"))
+        self.not_agent.is_agent = True
+        self.assertIn(self.not_agent.id, self._picker("Palsu"))
+        self.agent_2.is_agent = False
+        self.assertNotIn(self.agent_2.id, self._picker("Bibit"))
+
+    def test_picker_display_name_search(self):
+        # filter picker lewat _search_display_name: flag + complete_name, bukan email
+        self.agent_2.email = "sales@bibit.example"
+        partners = self.partner_m.with_context(commission_picker_role="is_agent").search([
+            ("display_name", "ilike", "Agen"),
+        ])
+        self.assertIn(self.agent_2, partners)
+        self.assertNotIn(self.not_agent, partners)
+        self.assertNotIn(self.agent_2.id, self._picker("bibit.example"))
+
+    def test_picker_other_domain_untouched(self):
+        # domain tanpa is_agent / OR domain lewat name_search biasa
+        result = self.partner_m.name_search("Palsu", ["|", ("is_agent", "=", True), ("id", "=", self.not_agent.id)])
+        self.assertIn(self.not_agent.id, {partner_id for partner_id, _name in result})
+
+    def test_picker_query_count(self):
+        self._picker("Agen")
+        self.env.invalidate_all()
+        # ga ada query id agent lagi: search + baca display_name
+        with self.assertQueryCount(2):
+            self._picker("Agen")
@@ -0,0 +1,64 @@
+from .common import CommissionCommon
+
+
+class TestCommissionQueryCount(CommissionCommon):
+    """Query budgets: the commission part must not grow with the number of orders."""
+
+    SIZES = (1, 10, 100)
+    # query tambahan dari modul ini di action_confirm, berapapun jumlah order
+    CONFIRM_EXTRA_BUDGET = 15
+    # selisih query tambahan invoice komisi antara batch kecil dan besar
+    INVOICE_EXTRA_GROWTH = 5
+
+    def _count_queries(self, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        func()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - before
+
+    def _create_orders(self, size, agent=True):
+        if agent:
+            return self.so_m.concat(*(self._create_agent_so() for _i in range(size)))
+        return self.so_m.create([{
+            "partner_id": self.cust.id,
+            "order_line": [(0, 0, {
+                "product_id": self.prod.id,
+                "product_uom_qty": 10.0,
+                "price_unit": 1000000.0,
+            })],
+        } for _i in range(size)])
+
+    def test_confirm_budget(self):
+        extras = {}
+        for size in self.SIZES:
+            regular = self._create_orders(size, agent=False)
+            agent = self._create_orders(size)
+            base = self._count_queries(regular.action_confirm)
+            extras[size] = self._count_queries(agent.action_confirm) - base
+            with self.subTest(size=size):
+                self.assertLessEqual(extras[size], self.CONFIRM_EXTRA_BUDGET)
+        # flat: 100 order ga boleh lebih mahal dari 1 order
+        self.assertLessEqual(extras[100], extras[1] + 2)
+
+    def _post_plain_invoices(self, orders):
+        # baseline: invoice yang sama dibikin + di-post langsung, tanpa logic komisi
+        account = orders._get_revenue_account()
+        self.env["account.move"].create(
+            [order._prepare_commission_invoice_vals(account) for order in orders]
+        ).action_post()
+
+    def test_invoice_budget_flat(self):
+        extras = {}
+        for size in self.SIZES:
+            plain = self._create_orders(size)
+            plain.action_confirm()
+            orders = self._create_orders(size)
+            orders.action_confirm()
+            base = self._count_queries(lambda: self._post_plain_invoices(plain))
+            extras[size] = self._count_queries(orders._create_commission_invoices) - base
+        # query komisi di luar bikin + post invoice ga boleh nambah per order:
+        # N+1 bikin selisih 100 vs 10 order minimal 90 query
+        self.assertLessEqual(extras[100] - extras[10], self.INVOICE_EXTRA_GROWTH)
+        self.assertLessEqual(extras[10] - extras[1], self.INVOICE_EXTRA_GROWTH)
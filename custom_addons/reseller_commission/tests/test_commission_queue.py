@@ -0,0 +1,51 @@
+from .common import CommissionCommon
+
+
+class TestCommissionQueue(CommissionCommon):
+
+    def test_queue_processes_and_records_errors(self):
+        ok = self._create_agent_so() | self._create_agent_so()
+        ok.action_confirm()
+        draft = self._create_agent_so()
+
+        (ok | draft).action_queue_commission_invoice()
+        self.assertTrue(all((ok | draft).mapped("commission_invoice_queued")))
+
+        processed = self.so_m._process_commission_invoice_queue(chunk_size=2, auto_commit=False)
+
+        self.assertEqual(processed, 3)
+        self.assertFalse(any((ok | draft).mapped("commission_invoice_queued")))
+        self.assertEqual(set(ok.mapped("commission_status")), {"invoiced"})
+        self.assertFalse(any(ok.mapped("commission_invoice_error")))
+        self.assertFalse(draft.commission_invoice_id)
+        self.assertTrue(draft.commission_invoice_error)
+
+    def test_queue_resume_only_pending(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        so.action_queue_commission_invoice()
+        self.so_m._process_commission_invoice_queue(auto_commit=False)
+
+        # run kedua ga ada kerjaan lagi, ga bikin invoice dobel
+        self.assertEqual(self.so_m._process_commission_invoice_queue(auto_commit=False), 0)
+        self.assertEqual(
+            self.env["account.move"].search_count([("invoice_origin", "=", so.name)]), 1,
+        )
+
+    def test_queue_ignores_regular_sales(self):
+        regular = self.so_m.create({"partner_id": self.cust.id})
+        regular.action_queue_commission_invoice()
+        self.assertFalse(regular.commission_invoice_queued)
+
+    def test_queue_same_transaction(self):
+        # antri + proses di transaksi yang sama, flag belum di-flush ke db
+        orders = self._create_agent_so() | self._create_agent_so() | self._create_agent_so()
+        orders.action_confirm()
+        orders.action_queue_commission_invoice()
+
+        processed = self.so_m._process_commission_invoice_queue(chunk_size=1, auto_commit=False)
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(set(orders.mapped("commission_status")), {"invoiced"})
+        self.assertFalse(any(orders.mapped("commission_invoice_error")))
+        self.assertEqual(len(orders.commission_invoice_id), 3)
@@ -0,0 +1,53 @@
+from .common import CommissionCommon
+
+
+class TestCommissionRateDefault(CommissionCommon):
+
+    def _create_vals(self, agent, **vals):
+        values = {
+            "partner_id": self.cust.id,
+            "is_agent_sale": True,
+            "agent_id": agent.id,
+            "principal_id": self.pt_b.id,
+        }
+        values.update(vals)
+        return values
+
+    def test_create_takes_agent_rate(self):
+        so = self.so_m.create(self._create_vals(self.pt_a))
+        self.assertEqual(so.commission_rate, 10.0)
+
+    def test_create_keeps_explicit_rate(self):
+        so = self.so_m.create(self._create_vals(self.pt_a, commission_rate=0.0))
+        self.assertEqual(so.commission_rate, 0.0)
+        so = self.so_m.create(self._create_vals(self.pt_a, commission_rate=4.0))
+        self.assertEqual(so.commission_rate, 4.0)
+
+    def test_write_agent_takes_rate(self):
+        agent = self.partner_m.create({"name": "PT Z", "is_agent": True, "commission_rate": 12.5})
+        so = self.so_m.create(self._create_vals(self.pt_a))
+        so.write({"agent_id": agent.id})
+        self.assertEqual(so.commission_rate, 12.5)
+
+    def test_create_rate_lookup_is_batched(self):
+        agents = self.partner_m.create([
+            {"name": f"Agent {i}", "is_agent": True, "commission_rate": 1.0 + i}
+            for i in range(20)
+        ])
+        self.env.invalidate_all()
+        with_rate = [self._create_vals(agent, commission_rate=5.0) for agent in agents]
+        without_rate = [self._create_vals(agent) for agent in agents]
+
+        before = self.env.cr.sql_log_count
+        self.so_m.create(with_rate)
+        self.env.flush_all()
+        cost_with = self.env.cr.sql_log_count - before
+
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        orders = self.so_m.create(without_rate)
+        self.env.flush_all()
+        cost_without = self.env.cr.sql_log_count - before
+
+        self.assertEqual(orders.mapped("commission_rate"), agents.mapped("commission_rate"))
+        self.assertLessEqual(cost_without - cost_with, 2)
@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from odoo import fields
+from odoo.exceptions import ValidationError
+
+from .common import CommissionCommon
+
+
+class TestCommissionRateHistory(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rate_m = cls.env["reseller.commission.rate"]
+        cls.today = fields.Date.today()
+        cls.rate_m.create([
+            {"agent_id": cls.pt_a.id, "valid_from": date(2020, 1, 1), "valid_to": cls.today - timedelta(days=1), "rate": 6.0},
+            {"agent_id": cls.pt_a.id, "valid_from": cls.today, "rate": 8.0},
+            {"agent_id": cls.pt_a.id, "principal_id": cls.pt_b.id, "valid_from": date(2020, 1, 1), "valid_to": date(2020, 12, 31), "rate": 15.0},
+        ])
+
+    def test_resolve_by_date_and_principal(self):
+        keys = [
+            (self.pt_a.id, None, self.today),
+            (self.pt_a.id, None, date(2021, 6, 1)),
+            (self.pt_a.id, self.pt_b.id, date(2020, 6, 1)),
+            (self.pt_a.id, self.pt_b.id, date(2021, 6, 1)),
+            (self.pt_a.id, None, date(2019, 1, 1)),
+        ]
+        with self.assertQueryCount(2):
+            rates = self.so_m._get_agent_commission_rates(keys)
+        self.assertEqual(rates[keys[0]], 8.0)
+        self.assertEqual(rates[keys[1]], 6.0)
+        self.assertEqual(rates[keys[2]], 15.0)
+        self.assertEqual(rates[keys[3]], 6.0)
+        # sebelum ada history -> rate di partner
+        self.assertEqual(rates[keys[4]], 10.0)
+
+    def test_create_uses_order_date(self):
+        so = self.so_m.create({
+            "partner_id": self.cust.id,
+            "is_agent_sale": True,
+            "agent_id": self.pt_a.id,
+            "principal_id": self.pt_b.id,
+            "date_order": "2020-03-01 10:00:00",
+        })
+        self.assertEqual(so.commission_rate, 15.0)
+        self.assertTrue(so.commission_rate_auto)
+
+    def test_confirm_refreshes_auto_rate(self):
+        so = self.so_m.create({
+            "partner_id": self.cust.id,
+            "is_agent_sale": True,
+            "agent_id": self.pt_a.id,
+            "principal_id": self.pt_b.id,
+            "date_order": "2021-03-01 10:00:00",
+            "order_line": [(0, 0, {"product_id": self.prod.id, "product_uom_qty": 1.0, "price_unit": 100.0})],
+        })
+        self.assertEqual(so.commission_rate, 6.0)
+        so.action_confirm()
+        self.assertEqual(so.commission_rate, 8.0)
+
+    def test_confirm_keeps_manual_rate(self):
+        so = self._create_agent_so(commission_rate=3.0)
+        self.assertFalse(so.commission_rate_auto)
+        so.action_confirm()
+        self.assertEqual(so.commission_rate, 3.0)
+
+    def test_overlap_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.rate_m.create({"agent_id": self.pt_a.id, "valid_from": date(2030, 1, 1), "rate": 9.0})
@@ -0,0 +1,57 @@
+from .common import CommissionCommon
+
+
+class TestCommissionRecompute(CommissionCommon):
+
+    def test_recompute_new_rate(self):
+        draft = self._create_agent_so()
+        confirmed = self._create_agent_so()
+        confirmed.action_confirm()
+
+        count = self.so_m._recompute_commission_amount_sql([("id", "in", (draft | confirmed).ids)], rate=7.5)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(draft.commission_rate, 7.5)
+        self.assertEqual(draft.commission_amount, 750000.0)
+        self.assertEqual(confirmed.commission_amount, 750000.0)
+
+    def test_recompute_skips_invoiced(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        so.action_create_commission_invoice()
+
+        count = self.so_m._recompute_commission_amount_sql([("id", "=", so.id)], rate=50.0)
+
+        self.assertEqual(count, 0)
+        self.assertEqual(so.commission_rate, 10.0)
+        self.assertEqual(so.commission_amount, 1000000.0)
+
+    def test_recompute_matches_orm(self):
+        so = self._create_agent_so(commission_rate=3.33)
+        expected = so.commission_amount
+        # rusakin nilai di db, recompute harus balikin sama persis kayak ORM
+        self.env.cr.execute("UPDATE sale_order SET commission_amount = 0 WHERE id = %s", [so.id])
+        so.invalidate_recordset(["commission_amount"])
+
+        self.so_m._recompute_commission_amount_sql([("id", "=", so.id)], chunk_size=1)
+        self.assertEqual(so.commission_amount, expected)
+
+    def test_recompute_wizard(self):
+        so = self._create_agent_so()
+        wizard = self.env["reseller.commission.recompute.wizard"].create({
+            "agent_ids": [(6, 0, self.pt_a.ids)],
+            "update_rate": True,
+            "new_rate": 20.0,
+        })
+        wizard.action_recompute()
+        self.assertEqual(so.commission_amount, 2000000.0)
+
+    def test_recompute_skips_unchanged(self):
+        so = self._create_agent_so()
+        other = self.so_m.create({"partner_id": so.partner_id.id})
+
+        count = self.so_m._recompute_commission_amount_sql([("id", "in", (so | other).ids)])
+
+        # nilai ga berubah dan order non-agent ga ikut ke-update
+        self.assertEqual(count, 0)
+        self.assertEqual(so.commission_amount, 1000000.0)
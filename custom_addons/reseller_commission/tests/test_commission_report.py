@@ -0,0 +1,29 @@
+from .common import CommissionCommon
+
+
+class TestCommissionReport(CommissionCommon):
+
+    def test_report_aggregates_by_status(self):
+        confirmed = self._create_agent_so() | self._create_agent_so(commission_rate=5.0)
+        confirmed.action_confirm()
+        self._create_agent_so()
+
+        report = self.env["reseller.commission.report"]
+        report._refresh()
+
+        groups = dict(
+            (status, (count, amount))
+            for status, count, amount in report._read_group(
+                [("agent_id", "=", self.pt_a.id)],
+                ["commission_status"],
+                ["order_count:sum", "commission_amount:sum"],
+            )
+        )
+        self.assertEqual(groups["confirmed"], (2, 1500000.0))
+        self.assertEqual(groups["draft"], (1, 1000000.0))
+
+    def test_report_excludes_regular_sales(self):
+        self.so_m.create({"partner_id": self.cust.id})
+        report = self.env["reseller.commission.report"]
+        report._refresh()
+        self.assertFalse(report.search([("agent_id", "=", False)]))
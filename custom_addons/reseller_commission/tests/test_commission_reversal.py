@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+from odoo.tests import Form
+
+from .common import CommissionCommon
+
+
+class TestCommissionReversal(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.prod.invoice_policy = "order"
+        cls.summary_m = cls.env["reseller.commission.summary"]
+
+    def _invoiced_so(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        so.action_create_commission_invoice()
+        return so
+
+    def _credit_note_total(self, so):
+        return sum(so.commission_reversal_ids.mapped("amount_untaxed"))
+
+    def test_cancel_reverses_commission(self):
+        so = self._invoiced_so()
+        so._action_cancel()
+
+        self.assertEqual(so.commission_status, "reversed")
+        self.assertEqual(so.commission_reversed_amount, 1000000.0)
+        credit_note = so.commission_reversal_ids
+        self.assertEqual(credit_note.move_type, "out_refund")
+        self.assertEqual(credit_note.state, "posted")
+        self.assertEqual(credit_note.reversed_entry_id, so.commission_invoice_id)
+        self.assertEqual(credit_note.partner_id, self.pt_b)
+        self.assertEqual(self._credit_note_total(so), 1000000.0)
+        self.assertFalse(self.summary_m._verify())
+
+    def test_partial_refund_reduces_commission(self):
+        so = self._invoiced_so()
+        invoice = so._create_invoices()
+        invoice.action_post()
+
+        # refund 4 dari 10 -> komisi berkurang 40%
+        refund = invoice._reverse_moves()
+        refund.invoice_line_ids.quantity = 4.0
+        refund.action_post()
+
+        self.assertEqual(so.commission_status, "invoiced")
+        self.assertEqual(so.commission_reversed_amount, 400000.0)
+        self.assertEqual(self._credit_note_total(so), 400000.0)
+        self.assertFalse(self.summary_m._verify())
+
+        # sisanya di-refund -> full reversed
+        refund = invoice._reverse_moves()
+        refund.invoice_line_ids.quantity = 6.0
+        refund.action_post()
+        self.assertEqual(so.commission_status, "reversed")
+        self.assertEqual(so.commission_reversed_amount, 1000000.0)
+        self.assertEqual(len(so.commission_reversal_ids), 2)
+
+    def test_cancel_after_partial_refund(self):
+        so = self._invoiced_so()
+        so._create_commission_reversals({so.id: 250000.0})
+        so._action_cancel()
+        self.assertEqual(so.commission_status, "reversed")
+        self.assertEqual(self._credit_note_total(so), 1000000.0)
+
+    def test_batch_one_credit_note_per_invoice(self):
+        orders = self.so_m.concat(*(self._create_agent_so() for _i in range(3)))
+        orders.action_confirm()
+        settlement = self.so_m._create_commission_settlements([("id", "in", orders.ids)])
+        self.assertEqual(len(settlement), 1)
+
+        # cuma 2 dari 3 order yang di-reverse, credit note cuma buat 2 order itu
+        credit_notes, skipped = orders[:2]._create_commission_reversals()
+        self.assertFalse(skipped)
+        self.assertEqual(len(credit_notes), 1)
+        self.assertEqual(len(credit_notes.invoice_line_ids), 2)
+        self.assertEqual(credit_notes.amount_untaxed, 2000000.0)
+        self.assertEqual(set(orders.mapped("commission_status")), {"reversed", "invoiced"})
+        self.assertEqual(orders[2].commission_status, "invoiced")
+
+    def test_refund_queues_locked_order(self):
+        so = self._invoiced_so()
+        invoice = so._create_invoices()
+        invoice.action_post()
+        refund = invoice._reverse_moves()
+        refund.invoice_line_ids.quantity = 4.0
+
+        # order lagi di-lock transaksi lain: refund tetep ke-post, reversal masuk antrian
+        with patch.object(type(self.so_m), "_lock_commission_orders", lambda orders, nowait=False: orders.browse()):
+            refund.action_post()
+        self.assertEqual(refund.state, "posted")
+        self.assertFalse(so.commission_reversal_ids)
+        queue = self.env["reseller.commission.reversal.queue"].search([("order_id", "=", so.id)])
+        self.assertEqual(queue.amount, 400000.0)
+
+        processed = queue._process_queue(auto_commit=False)
+        self.assertEqual(processed, 1)
+        self.assertFalse(queue.exists())
+        self.assertEqual(so.commission_reversed_amount, 400000.0)
+        self.assertEqual(self._credit_note_total(so), 400000.0)
+
+    def test_skip_not_invoiced(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        credit_notes, skipped = so._create_commission_reversals()
+        self.assertFalse(credit_notes)
+        self.assertIn(so, skipped)
+        self.assertEqual(so.commission_status, "confirmed")
+
+    def test_wizard_percentage(self):
+        orders = self._invoiced_so() | self._invoiced_so()
+        wizard = Form(self.env["reseller.commission.reversal.wizard"].with_context(
+            active_model="sale.order", active_ids=orders.ids,
+        ))
+        wizard.percentage = 50.0
+        wizard.save().action_reverse()
+        self.assertEqual(orders.mapped("commission_reversed_amount"), [500000.0, 500000.0])
+        self.assertEqual(set(orders.mapped("commission_status")), {"invoiced"})
+        self.assertFalse(self.summary_m._verify())
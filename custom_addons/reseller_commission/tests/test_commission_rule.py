@@ -0,0 +1,142 @@
+from unittest.mock import patch
+
+from odoo.exceptions import ValidationError
+
+from .common import CommissionCommon
+
+
+class TestCommissionRule(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rule_m = cls.env["reseller.commission.rule"]
+        cls.categ = cls.env["product.category"].create({"name": "Elektronik"})
+        cls.categ_child = cls.env["product.category"].create({"name": "HP", "parent_id": cls.categ.id})
+        cls.prod_hp = cls.env["product.product"].create({
+            "name": "HP Test",
+            "list_price": 1000000.0,
+            "type": "consu",
+            "categ_id": cls.categ_child.id,
+        })
+        # 5% sampai 5jt, 8% di atasnya
+        cls.rule = cls.rule_m.create({
+            "name": "Tier PT A",
+            "agent_id": cls.pt_a.id,
+            "tier_ids": [(0, 0, {"threshold": 0.0, "rate": 5.0}), (0, 0, {"threshold": 5000000.0, "rate": 8.0})],
+        })
+
+    def test_tier_per_order(self):
+        so = self._create_agent_so()
+        # 5jt * 5% + 5jt * 8%
+        self.assertAlmostEqual(so.commission_amount, 250000.0 + 400000.0)
+
+        small = self._create_agent_so(order_line=[(0, 0, {
+            "product_id": self.prod.id, "product_uom_qty": 2.0, "price_unit": 1000000.0,
+        })])
+        self.assertAlmostEqual(small.commission_amount, 100000.0)
+
+    def test_tier_monthly_volume(self):
+        self.rule.tier_basis = "month"
+        first = self._create_agent_so(date_order="2024-05-02 10:00:00", order_line=[(0, 0, {
+            "product_id": self.prod.id, "product_uom_qty": 4.0, "price_unit": 1000000.0,
+        })])
+        first.action_confirm()
+        # confirm nge-set date_order ke sekarang
+        first.date_order = "2024-05-02 10:00:00"
+        second = self._create_agent_so(date_order="2024-05-20 10:00:00", order_line=[(0, 0, {
+            "product_id": self.prod.id, "product_uom_qty": 4.0, "price_unit": 1000000.0,
+        })])
+        # volume sebelumnya 4jt: 1jt kena 5%, 3jt kena 8%
+        self.assertAlmostEqual(first.commission_amount, 200000.0)
+        self.assertAlmostEqual(second.commission_amount, 50000.0 + 240000.0)
+
+        other_month = self._create_agent_so(date_order="2024-06-01 10:00:00", order_line=[(0, 0, {
+            "product_id": self.prod.id, "product_uom_qty": 4.0, "price_unit": 1000000.0,
+        })])
+        self.assertAlmostEqual(other_month.commission_amount, 200000.0)
+
+    def test_tier_monthly_volume_follows_period(self):
+        self.rule.tier_basis = "month"
+        later = self._create_agent_so(date_order="2024-05-20 10:00:00", order_line=[(0, 0, {
+            "product_id": self.prod.id, "product_uom_qty": 4.0, "price_unit": 1000000.0,
+        })])
+        self.assertAlmostEqual(later.commission_amount, 200000.0)
+
+        first = self._create_agent_so(date_order="2024-05-02 10:00:00", order_line=[(0, 0, {
+            "product_id": self.prod.id, "product_uom_qty": 4.0, "price_unit": 1000000.0,
+        })])
+        first.action_confirm()
+        first.date_order = "2024-05-02 10:00:00"
+        # order sebelumnya confirm, volume naik 4jt
+        self.assertAlmostEqual(later.commission_amount, 50000.0 + 240000.0)
+
+        first._action_cancel()
+        self.assertAlmostEqual(later.commission_amount, 200000.0)
+
+        # rule berubah, order yang belum di-invoice ikut
+        self.rule.tier_ids.filtered(lambda t: t.threshold == 0.0).rate = 6.0
+        self.assertAlmostEqual(later.commission_amount, 240000.0)
+
+    def test_category_override(self):
+        self.rule.category_ids = [(0, 0, {"categ_id": self.categ.id, "rate": 20.0})]
+        so = self._create_agent_so(order_line=[
+            (0, 0, {"product_id": self.prod.id, "product_uom_qty": 2.0, "price_unit": 1000000.0}),
+            (0, 0, {"product_id": self.prod_hp.id, "product_uom_qty": 1.0, "price_unit": 1000000.0}),
+        ])
+        # sub-kategori ikut rate parent-nya, sisanya lewat tier
+        self.assertAlmostEqual(so.commission_amount, 200000.0 + 100000.0)
+
+    def test_min_and_cap(self):
+        self.rule.write({"min_amount": 150000.0, "cap_amount": 500000.0})
+        small = self._create_agent_so(order_line=[(0, 0, {
+            "product_id": self.prod.id, "product_uom_qty": 1.0, "price_unit": 1000000.0,
+        })])
+        big = self._create_agent_so()
+        self.assertAlmostEqual(small.commission_amount, 150000.0)
+        self.assertAlmostEqual(big.commission_amount, 500000.0)
+
+        with self.assertRaises(ValidationError):
+            self.rule.min_amount = 600000.0
+
+    def test_principal_rule_wins(self):
+        self.rule_m.create({
+            "name": "PT A - PT B",
+            "agent_id": self.pt_a.id,
+            "principal_id": self.pt_b.id,
+            "tier_ids": [(0, 0, {"threshold": 0.0, "rate": 3.0})],
+        })
+        so = self._create_agent_so()
+        self.assertAlmostEqual(so.commission_amount, 300000.0)
+
+    def test_confirm_ruled_without_rate(self):
+        so = self._create_agent_so(commission_rate=0.0)
+        so.action_confirm()
+        self.assertEqual(so.commission_status, "confirmed")
+        self.assertAlmostEqual(so.commission_amount, 250000.0 + 400000.0)
+
+    def test_recompute_ruled_written_once(self):
+        so = self._create_agent_so()
+        ledger = self.env["reseller.commission.ledger"]
+        rows = ledger.search_count([("order_id", "=", so.id)])
+
+        # order pakai rule ga lewat rumus flat dulu, nilai sama = ga ada delta ledger
+        self.assertEqual(self.so_m._recompute_commission_amount_sql([("id", "=", so.id)]), 0)
+        self.assertEqual(ledger.search_count([("order_id", "=", so.id)]), rows)
+        self.assertAlmostEqual(so.commission_amount, 250000.0 + 400000.0)
+
+    def test_rule_rename_no_recompute(self):
+        with patch.object(type(self.so_m), "_recompute_commission_amount_sql") as recompute:
+            self.rule.name = "Tier PT A Baru"
+            self.rule.tier_ids[0].write({})
+        recompute.assert_not_called()
+
+    def test_rule_cache_invalidated(self):
+        so = self._create_agent_so()
+        self.rule.tier_ids[0].rate = 6.0
+        self.so_m._recompute_commission_amount_sql([("id", "=", so.id)])
+        self.assertAlmostEqual(so.commission_amount, 300000.0 + 400000.0)
+
+        self.rule.active = False
+        so.commission_rate = 10.0
+        self.assertAlmostEqual(so.commission_amount, 1000000.0)
@@ -0,0 +1,56 @@
+from odoo import fields
+from odoo.exceptions import UserError
+
+from .common import CommissionCommon
+
+
+class TestCommissionSettlement(CommissionCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.orders = self._create_agent_so() | self._create_agent_so() | self._create_agent_so(commission_rate=5.0)
+        self.orders.action_confirm()
+
+    def test_settlement_one_line_per_order(self):
+        invoices = self.so_m._create_commission_settlements([("id", "in", self.orders.ids)])
+
+        self.assertEqual(len(invoices), 1)
+        self.assertEqual(invoices.state, "posted")
+        self.assertEqual(invoices.partner_id, self.pt_b)
+        self.assertEqual(len(invoices.invoice_line_ids), 3)
+        self.assertEqual(invoices.amount_untaxed, 2500000.0)
+        self.assertEqual(self.orders.commission_invoice_id, invoices)
+        self.assertEqual(set(self.orders.mapped("commission_status")), {"invoiced"})
+
+    def test_settlement_summary_line(self):
+        invoices = self.so_m._create_commission_settlements(
+            [("id", "in", self.orders.ids)], summarize=True,
+        )
+        self.assertEqual(len(invoices.invoice_line_ids), 1)
+        self.assertEqual(invoices.amount_untaxed, 2500000.0)
+
+    def test_settlement_groups_by_principal(self):
+        pt_c = self.partner_m.create({"name": "PT C", "is_principal": True})
+        other = self._create_agent_so(principal_id=pt_c.id)
+        other.action_confirm()
+
+        invoices = self.so_m._create_commission_settlements([("id", "in", (self.orders | other).ids)])
+
+        self.assertEqual(len(invoices), 2)
+        self.assertEqual(other.commission_invoice_id.partner_id, pt_c)
+
+    def test_settlement_skips_invoiced(self):
+        self.orders[0].action_create_commission_invoice()
+        invoices = self.so_m._create_commission_settlements([("id", "in", self.orders.ids)])
+        self.assertEqual(len(invoices.invoice_line_ids), 2)
+
+    def test_wizard_nothing_to_settle(self):
+        self.so_m._create_commission_settlements([("id", "in", self.orders.ids)])
+        today = fields.Date.today()
+        wizard = self.env["reseller.commission.settlement.wizard"].create({
+            "date_from": today.replace(day=1),
+            "date_to": today,
+            "principal_ids": [(6, 0, self.pt_b.ids)],
+        })
+        with self.assertRaises(UserError):
+            wizard.action_settle()
@@ -0,0 +1,72 @@
+import csv
+import io
+from datetime import date
+
+from odoo.tests import HttpCase, tagged
+
+from .common import CommissionCommon
+
+
+class TestCommissionStatement(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.orders = cls.so_m
+        for day in (3, 1, 2):
+            cls.orders |= cls._create_confirmed_so(f"2024-03-0{day} 10:00:00")
+        # di luar periode + belum confirm, ga boleh ikut
+        cls._create_confirmed_so("2024-04-01 10:00:00")
+        cls._create_agent_so(date_order="2024-03-05 10:00:00")
+
+    @classmethod
+    def _create_confirmed_so(cls, date_order):
+        so = cls._create_agent_so()
+        so.action_confirm()
+        # confirm nge-set date_order ke sekarang
+        so.date_order = date_order
+        return so
+
+    def _read_csv(self, role="agent", partner=None, batch_size=2000):
+        stream = self.so_m._stream_commission_statement(
+            "csv", role, (partner or self.pt_a).id, date(2024, 3, 1), date(2024, 3, 31), batch_size,
+        )
+        return list(csv.reader(io.StringIO(b"".join(stream).decode("utf-8-sig"))))
+
+    def test_csv_keyset_pages(self):
+        # batch 1 row biar keyset pagination-nya kepake
+        header, *rows = self._read_csv(batch_size=1)
+        self.assertEqual(len(header), len(self.so_m._get_commission_statement_header()))
+        self.assertEqual([row[0] for row in rows], self.orders.sorted("date_order").mapped("name"))
+        self.assertEqual([float(row[9]) for row in rows], [1000000.0] * 3)
+
+    def test_principal_statement(self):
+        _header, *rows = self._read_csv(role="principal", partner=self.pt_b)
+        self.assertEqual(len(rows), 3)
+        _header, *rows = self._read_csv(role="principal", partner=self.pt_a)
+        self.assertFalse(rows)
+
+    def test_xlsx(self):
+        stream = self.so_m._stream_commission_statement(
+            "xlsx", "agent", self.pt_a.id, date(2024, 3, 1), date(2024, 3, 31),
+        )
+        content = b"".join(stream)
+        self.assertTrue(content.startswith(b"PK"))
+
+
+@tagged("-at_install", "post_install")
+class TestCommissionStatementController(HttpCase):
+
+    def test_download_csv(self):
+        agent = self.env["res.partner"].create({"name": "PT A Statement", "is_agent": True})
+        self.authenticate("admin", "admin")
+        response = self.url_open(
+            f"/reseller_commission/statement/agent/{agent.id}?date_from=2024-01-01&date_to=2024-12-31&file_format=csv",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("text/csv", response.headers["Content-Type"])
+        self.assertIn("attachment", response.headers["Content-Disposition"])
+        self.assertEqual(len(response.content.decode("utf-8-sig").splitlines()), 1)
+
+        response = self.url_open(f"/reseller_commission/statement/nope/{agent.id}")
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,76 @@
+from .common import CommissionCommon
+
+
+class TestCommissionSummary(CommissionCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.summary_m = cls.env["reseller.commission.summary"]
+
+    def _totals(self):
+        self.env.flush_all()
+        rows = self.summary_m.search([("agent_id", "=", self.pt_a.id)])
+        return (
+            sum(rows.mapped("amount_open")),
+            sum(rows.mapped("amount_invoiced")),
+            sum(rows.mapped("amount_paid")),
+        )
+
+    def test_deltas_follow_status(self):
+        so = self._create_agent_so()
+        self.assertEqual(self._totals(), (0.0, 0.0, 0.0))
+
+        so.action_confirm()
+        self.assertEqual(self._totals(), (1000000.0, 0.0, 0.0))
+
+        # rate berubah -> commission_amount di-recompute ORM, delta ikut
+        so.commission_rate = 20.0
+        self.assertEqual(self._totals(), (2000000.0, 0.0, 0.0))
+
+        so.action_create_commission_invoice()
+        self.assertEqual(self._totals(), (0.0, 2000000.0, 0.0))
+
+        so.commission_invoice_id.write({"payment_state": "paid"})
+        self.so_m._sync_commission_paid_status()
+        self.assertEqual(self._totals(), (0.0, 2000000.0, 2000000.0))
+        self.assertFalse(self.summary_m._verify())
+
+    def test_sql_recompute_delta(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        self.so_m._recompute_commission_amount_sql([("id", "=", so.id)], rate=5.0)
+        self.assertEqual(self._totals(), (500000.0, 0.0, 0.0))
+        self.assertFalse(self.summary_m._verify())
+
+    def test_cancel_and_unlink(self):
+        so = self._create_agent_so()
+        so.action_confirm()
+        so._action_cancel()
+        self.assertEqual(self._totals(), (0.0, 0.0, 0.0))
+        so.unlink()
+        self.assertFalse(self.summary_m._verify())
+
+    def test_rebuild_fixes_drift(self):
+        self._create_agent_so().action_confirm()
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE reseller_commission_summary SET amount_open = amount_open + 1")
+        self.summary_m.invalidate_model()
+        self.assertTrue(self.summary_m._verify())
+
+        self.assertEqual(self.summary_m._rebuild(), 1)
+        self.assertFalse(self.summary_m._verify())
+        self.assertEqual(self._totals(), (1000000.0, 0.0, 0.0))
+
+    def test_partner_kpis(self):
+        first = self._create_agent_so()
+        second = self._create_agent_so()
+        (first | second).action_confirm()
+        second.action_create_commission_invoice()
+
+        self.pt_a.invalidate_recordset()
+        self.assertEqual(self.pt_a.commission_open_amount, 1000000.0)
+        self.assertEqual(self.pt_a.commission_invoiced_month_amount, 1000000.0)
+        self.assertEqual(self.pt_a.commission_paid_ytd_amount, 0.0)
+        self.pt_b.invalidate_recordset()
+        self.assertEqual(self.pt_b.commission_open_amount, 1000000.0)
@@ -0,0 +1,60 @@
+from .common import CommissionCommon
+
+
+class TestRevenueAccount(CommissionCommon):
+
+    def test_company_setting_wins(self):
+        acc = self.env["account.account"].create({
+            "name": "Pendapatan Komisi",
+            "code": "790001",
+            "account_type": "income_other",
+        })
+        self.env.company.commission_revenue_account_id = acc
+        self.assertEqual(self.so_m._get_revenue_account(), acc)
+
+        # deprecated -> balik ke pencarian otomatis
+        acc.deprecated = True
+        self.assertNotEqual(self.so_m._get_revenue_account(), acc)
+
+    def test_result_is_cached(self):
+        self.so_m._get_revenue_account()
+        with self.assertQueryCount(0):
+            self.so_m._get_revenue_account_id(self.env.company.id)
+
+    def test_cache_cleared_on_new_account(self):
+        self.so_m._get_revenue_account()
+        # account baru yang lebih cocok (kode "41" paling depan) langsung kepakai
+        better = self.env["account.account"].create({
+            "name": "Pendapatan Komisi Agen",
+            "code": "41",
+            "account_type": "income",
+        })
+        self.assertEqual(self.so_m._get_revenue_account(), better)
+
+        acc = self.env["account.account"].create({
+            "name": "Pendapatan Komisi 2",
+            "code": "790002",
+            "account_type": "income_other",
+        })
+        self.env.company.commission_revenue_account_id = acc
+        self.assertEqual(self.so_m._get_revenue_account(), acc)
+
+    def test_cache_kept_on_rename(self):
+        self.so_m._get_revenue_account()
+        self.so_m._get_revenue_account().name = "Pendapatan Lain"
+        with self.assertQueryCount(0):
+            self.so_m._get_revenue_account_id(self.env.company.id)
+
+    def test_account_per_company(self):
+        company_2 = self.env["res.company"].create({"name": "Company 2"})
+        acc_2 = self.env["account.account"].with_company(company_2).create({
+            "name": "Revenue Company 2",
+            "code": "410001",
+            "account_type": "income",
+            "company_ids": [(6, 0, company_2.ids)],
+        })
+        company_2.commission_revenue_account_id = acc_2
+
+        account = self.so_m.with_company(company_2)._get_revenue_account()
+        self.assertEqual(account, acc_2)
+        self.assertNotEqual(self.so_m._get_revenue_account(), acc_2)
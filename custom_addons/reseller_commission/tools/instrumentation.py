@@ -0,0 +1,60 @@
+"""Opt-in timing metrics for the commission hot paths.
+
+Switched on with the ``reseller_commission.instrumentation`` system
+parameter. When it is off a wrapped method only pays for one cached
+parameter lookup.
+"""
+import functools
+import logging
+import time
+
+from odoo.tools import SQL, str2bool
+
+_logger = logging.getLogger(__name__)
+
+PARAM = "reseller_commission.instrumentation"
+
+
+def is_enabled(env):
+    # get_param di-ormcache, jadi murah walau dipanggil tiap call
+    return str2bool(env["ir.config_parameter"].sudo().get_param(PARAM, "False"))
+
+
+def record(env, name, record_count, duration_ms, query_count):
+    """Append one sample and emit the matching log line.
+
+    Samples are plain inserts, never updates, so concurrent workers don't
+    queue on a shared counter row.
+    """
+    _logger.info(
+        f"commission_metric name={name} records={record_count} "
+        f"duration_ms={duration_ms:.1f} queries={query_count}"
+    )
+    env.cr.execute(SQL("""
+        INSERT INTO reseller_commission_metric (
+            name, call_count, record_count, duration_ms, query_count,
+            create_uid, create_date, write_uid, write_date
+        ) VALUES (%s, 1, %s, %s, %s, %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC')
+    """, name, record_count, duration_ms, query_count, env.uid, env.uid))
+
+
+def instrument(name):
+    """Measure calls, records, duration and SQL queries of a model method.
+
+    Nothing is recorded when the method raises, the transaction may be
+    aborted by then.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not is_enabled(self.env):
+                return method(self, *args, **kwargs)
+            cr = self.env.cr
+            queries = cr.sql_log_count
+            start = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            duration_ms = (time.perf_counter() - start) * 1000.0
+            record(self.env, name, len(self), duration_ms, cr.sql_log_count - queries)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,101 @@
+"""Lock-light helpers for the migration scripts of this module.
+
+Every helper is idempotent so an interrupted upgrade can simply be re-run.
+"""
+import logging
+from contextlib import closing
+
+from odoo.sql_db import db_connect
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+
+def column_type(cr, table, column):
+    """Return the ``udt_name`` of a column, or None if it doesn't exist."""
+    cr.execute("""
+        SELECT udt_name FROM information_schema.columns
+         WHERE table_schema = current_schema()
+           AND table_name = %s AND column_name = %s
+    """, [table, column])
+    row = cr.fetchone()
+    return row[0] if row else None
+
+
+def add_column(cr, table, column, sqltype):
+    """Add a nullable column without default.
+
+    Without a default this is a metadata-only change: no table rewrite and
+    the ``ACCESS EXCLUSIVE`` lock is only held for an instant.
+    """
+    cr.execute(SQL(
+        "ALTER TABLE %s ADD COLUMN IF NOT EXISTS %s " + sqltype,
+        SQL.identifier(table), SQL.identifier(column),
+    ))
+
+
+def backfill_in_batches(cr, table, assignment, where, batch_size=50000):
+    """Run ``UPDATE table SET assignment WHERE where`` in id ranges.
+
+    Each batch is committed so row locks are released as we go, and only
+    rows still matching ``where`` are touched, which makes it safe to
+    re-run after an interruption.
+    """
+    cr.execute(SQL("SELECT MIN(id), MAX(id) FROM %s WHERE %s", SQL.identifier(table), where))
+    min_id, max_id = cr.fetchone()
+    if min_id is None:
+        return
+    total = 0
+    for start in range(min_id, max_id + 1, batch_size):
+        cr.execute(SQL(
+            "UPDATE %s SET %s WHERE id >= %s AND id < %s AND %s",
+            SQL.identifier(table), assignment, start, start + batch_size, where,
+        ))
+        total += cr.rowcount
+        cr.commit()
+        done = min(start + batch_size, max_id + 1) - min_id
+        _logger.info(
+            "Backfill %s: %s rows updated (%.1f%% of id range)",
+            table, total, 100.0 * done / (max_id - min_id + 1),
+        )
+
+
+def create_index_concurrently(cr, indexname, table, expressions, method="btree", where=""):
+    """Create an index with ``CREATE INDEX CONCURRENTLY`` when possible.
+
+    The current transaction is committed first, and the index is built from
+    a separate autocommit connection so writes on the table are not blocked.
+    An invalid index left by an interrupted build is dropped and rebuilt.
+    Falls back to a plain ``CREATE INDEX`` in the current transaction.
+    """
+    cr.execute("""
+        SELECT ix.indisvalid FROM pg_index ix
+          JOIN pg_class c ON c.oid = ix.indexrelid
+         WHERE c.relname = %s
+    """, [indexname])
+    row = cr.fetchone()
+    if row and row[0]:
+        return
+    cr.commit()
+
+    where_clause = f" WHERE {where}" if where else ""
+    try:
+        with closing(db_connect(cr.dbname).cursor()) as index_cr:
+            connection = index_cr._cnx
+            connection.autocommit = True
+            try:
+                if row:
+                    index_cr.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{indexname}"')
+                index_cr.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{indexname}" '
+                    f'ON "{table}" USING {method} ({", ".join(expressions)}){where_clause}'
+                )
+            finally:
+                connection.autocommit = False
+        _logger.info("Index %s created concurrently", indexname)
+    except Exception:
+        _logger.warning("Index %s can't be created concurrently, falling back", indexname, exc_info=True)
+        if row:
+            cr.execute(f'DROP INDEX IF EXISTS "{indexname}"')
+        create_index(cr, indexname, table, expressions, method=method, where=where)
@@ -0,0 +1,5 @@
+from . import commission_settlement_wizard
+from . import commission_recompute_wizard
+from . import commission_statement_wizard
+from . import commission_reversal_wizard
+from . import commission_import_wizard
@@ -0,0 +1,42 @@
+import base64
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+
+class CommissionImportWizard(models.TransientModel):
+    _name = "reseller.commission.import.wizard"
+    _description = "Agent Sale Import Wizard"
+
+    file = fields.Binary(string="File", required=True)
+    filename = fields.Char(string="Nama File")
+    confirm = fields.Boolean(
+        string="Langsung Confirm", default=True,
+        help="Order yang valid langsung di-confirm, tanggal order dari file tetep dipakai",
+    )
+    state = fields.Selection([("draft", "Draft"), ("done", "Done")], default="draft")
+    result = fields.Text(string="Hasil", readonly=True)
+
+    def action_import(self):
+        self.ensure_one()
+        file_format = "json" if (self.filename or "").lower().endswith(".json") else "csv"
+        try:
+            result = self.env["sale.order"].load_agent_sales(
+                base64.b64decode(self.file), file_format=file_format, confirm=self.confirm,
+            )
+        except ValueError as e:
+            raise UserError(_("File ga bisa dibaca: %s", e))
+
+        lines = [_("%(count)s order dibuat, %(errors)s error.", count=len(result["created"]), errors=len(result["errors"]))]
+        lines += [
+            _("Baris %(row)s (%(ref)s): %(error)s", row=error["row"] + 1, ref=error["ref"] or "-", error=error["error"])
+            for error in result["errors"]
+        ]
+        self.write({"state": "done", "result": "\n".join(lines)})
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
@@ -0,0 +1,44 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class CommissionRecomputeWizard(models.TransientModel):
+    _name = "reseller.commission.recompute.wizard"
+    _description = "Commission Recompute Wizard"
+
+    agent_ids = fields.Many2many(
+        "res.partner", string="Agent",
+        domain="[('is_agent', '=', True)]",
+        help="Kosongin buat semua agent",
+    )
+    date_from = fields.Date(string="Order Dari Tanggal")
+    update_rate = fields.Boolean(string="Ganti Rate")
+    new_rate = fields.Float(string="Rate Baru (%)")
+
+    @api.constrains("update_rate", "new_rate")
+    def _check_new_rate(self):
+        for wiz in self:
+            if wiz.update_rate and not 0 <= wiz.new_rate <= 100:
+                raise ValidationError(_("Commission rate harus 0-100%"))
+
+    def action_recompute(self):
+        self.ensure_one()
+        domain = [("is_agent_sale", "=", True)]
+        if self.agent_ids:
+            domain.append(("agent_id", "in", self.agent_ids.ids))
+        if self.date_from:
+            domain.append(("date_order", ">=", self.date_from))
+
+        count = self.env["sale.order"]._recompute_commission_amount_sql(
+            domain, rate=self.new_rate if self.update_rate else None,
+        )
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Recompute Commission"),
+                "message": _("%(count)s order di-recompute.", count=count),
+                "type": "success",
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
@@ -0,0 +1,55 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class CommissionReversalWizard(models.TransientModel):
+    _name = "reseller.commission.reversal.wizard"
+    _description = "Commission Reversal Wizard"
+
+    order_ids = fields.Many2many(
+        "sale.order", string="Sales Order",
+        domain="[('is_agent_sale', '=', True), ('commission_status', 'in', ('invoiced', 'paid'))]",
+        default=lambda self: self._default_order_ids(),
+    )
+    percentage = fields.Float(
+        string="Persen Komisi (%)", default=100.0,
+        help="Bagian komisi tiap order yang di-reverse, maksimal sisa komisi yang belum di-reverse",
+    )
+    reason = fields.Char(string="Alasan")
+
+    @api.model
+    def _default_order_ids(self):
+        if self.env.context.get("active_model") != "sale.order":
+            return False
+        orders = self.env["sale.order"].browse(self.env.context.get("active_ids", []))
+        return orders.filtered(lambda o: o.is_agent_sale and o.commission_status in ("invoiced", "paid"))
+
+    @api.constrains("percentage")
+    def _check_percentage(self):
+        for wiz in self:
+            if not 0 < wiz.percentage <= 100:
+                raise ValidationError(_("Persen komisi harus 0-100%"))
+
+    def action_reverse(self):
+        self.ensure_one()
+        amounts = None
+        if self.percentage < 100:
+            amounts = {order.id: order.commission_amount * self.percentage / 100 for order in self.order_ids}
+        credit_notes, skipped = self.order_ids._create_commission_reversals(amounts, reason=self.reason)
+
+        message = _("%(count)s credit note komisi dibuat.", count=len(credit_notes))
+        if skipped:
+            message += "\n" + "\n".join(
+                f"{order.name}: {reason}" for order, reason in skipped.items()
+            )
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Reverse Commission"),
+                "message": message,
+                "type": "warning" if skipped else "success",
+                "sticky": bool(skipped),
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+
+
+class CommissionSettlementWizard(models.TransientModel):
+    _name = "reseller.commission.settlement.wizard"
+    _description = "Commission Settlement Wizard"
+
+    date_from = fields.Date(
+        string="Dari Tanggal", required=True,
+        default=lambda self: fields.Date.today().replace(day=1),
+    )
+    date_to = fields.Date(
+        string="Sampai Tanggal", required=True,
+        default=fields.Date.today,
+    )
+    principal_ids = fields.Many2many(
+        "res.partner", string="Principal",
+        domain="[('is_principal', '=', True)]",
+        help="Kosongin buat semua principal",
+    )
+    line_mode = fields.Selection(
+        [("order", "Satu line per SO"), ("summary", "Satu line per periode")],
+        string="Invoice Line", default="order", required=True,
+    )
+
+    @api.constrains("date_from", "date_to")
+    def _check_dates(self):
+        for wiz in self:
+            if wiz.date_from > wiz.date_to:
+                raise ValidationError(_("Tanggal awal harus sebelum tanggal akhir"))
+
+    def action_settle(self):
+        self.ensure_one()
+        domain = [
+            ("date_order", ">=", self.date_from),
+            ("date_order", "<", self.date_to + timedelta(days=1)),
+        ]
+        if self.principal_ids:
+            domain.append(("principal_id", "in", self.principal_ids.ids))
+
+        invoices = self.env["sale.order"]._create_commission_settlements(
+            domain, summarize=self.line_mode == "summary",
+        )
+        if not invoices:
+            raise UserError(_("Ga ada komisi confirmed buat di-settle di periode ini"))
+
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Settlement Invoices"),
+            "res_model": "account.move",
+            "view_mode": "list,form",
+            "domain": [("id", "in", invoices.ids)],
+            "target": "current",
+        }
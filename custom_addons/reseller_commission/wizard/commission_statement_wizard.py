@@ -0,0 +1,47 @@
+from urllib.parse import urlencode
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class CommissionStatementWizard(models.TransientModel):
+    _name = "reseller.commission.statement.wizard"
+    _description = "Commission Statement Wizard"
+
+    role = fields.Selection(
+        [("agent", "Agent"), ("principal", "Principal")],
+        string="Statement Buat", default="agent", required=True,
+    )
+    partner_id = fields.Many2one(
+        "res.partner", string="Partner", required=True,
+        domain="[('is_agent', '=', True)] if role == 'agent' else [('is_principal', '=', True)]",
+    )
+    date_from = fields.Date(
+        string="Dari Tanggal", required=True,
+        default=lambda self: fields.Date.context_today(self).replace(month=1, day=1),
+    )
+    date_to = fields.Date(string="Sampai Tanggal", required=True, default=fields.Date.context_today)
+    file_format = fields.Selection(
+        [("xlsx", "Excel (XLSX)"), ("csv", "CSV")],
+        string="Format", default="xlsx", required=True,
+    )
+
+    @api.constrains("date_from", "date_to")
+    def _check_dates(self):
+        for wiz in self:
+            if wiz.date_from > wiz.date_to:
+                raise ValidationError(_("Tanggal awal ga boleh lewat tanggal akhir"))
+
+    def action_download(self):
+        # file-nya di-stream sama controller, wizard cuma bikin URL
+        self.ensure_one()
+        query = urlencode({
+            "date_from": self.date_from,
+            "date_to": self.date_to,
+            "file_format": self.file_format,
+        })
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/reseller_commission/statement/{self.role}/{self.partner_id.id}?{query}",
+            "target": "new",
+        }